@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# Import-time report for CiefpChannelManager.
+#
+# Capture a boot profile on the receiver with Python's import-time tracer:
+#
+#   init 4
+#   PYTHONPROFILEIMPORTTIME=1 enigma2 2> /tmp/importtime.log
+#   (wait for the GUI, then) init 4; init 3
+#
+# and summarise it with:
+#
+#   python3 bench_import.py /tmp/importtime.log [/tmp/importtime-old.log ...]
+#
+# Every module of the plugin package is listed with its cumulative import
+# cost and the heaviest modules pulled in underneath it, so two logs taken
+# before and after a change can be compared side by side.
+import re
+import sys
+
+PACKAGE = "Plugins.Extensions.CiefpChannelManager"
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+HEAVY_LIMIT = 5
+
+def parse_log(path):
+    entries = []
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            match = LINE_RE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                entries.append((int(self_us), int(cumulative_us), len(indent), name))
+    return entries
+
+def subtree(entries, index):
+    depth = entries[index][2]
+    children = []
+    i = index - 1
+    while i >= 0 and entries[i][2] > depth:
+        children.append(entries[i])
+        i -= 1
+    return children
+
+def report(path):
+    entries = parse_log(path)
+    total_us = 0
+    print(f"{path}:")
+    for index, (self_us, cumulative_us, depth, name) in enumerate(entries):
+        if not name.startswith(PACKAGE):
+            continue
+        parent = next((e for e in entries[index + 1:] if e[2] < depth), None)
+        if parent is None or not parent[3].startswith(PACKAGE):
+            total_us += cumulative_us
+        heavy = sorted((e for e in subtree(entries, index) if not e[3].startswith(PACKAGE)), reverse=True)[:HEAVY_LIMIT]
+        print(f"  {name:<55} {cumulative_us / 1000.0:9.1f} ms")
+        for child in heavy:
+            print(f"      {child[3]:<51} {child[0] / 1000.0:9.1f} ms self")
+    print(f"  {'total':<55} {total_us / 1000.0:9.1f} ms\n")
+    return total_us
+
+def main(argv):
+    if not argv:
+        print("usage: bench_import.py IMPORTTIME_LOG [IMPORTTIME_LOG ...]")
+        return 2
+    for path in argv:
+        report(path)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
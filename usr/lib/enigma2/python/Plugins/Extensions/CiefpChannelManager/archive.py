@@ -0,0 +1,13 @@
+import os
+import shutil
+import zipfile
+
+def extract_settings_archive(zip_path, destination, temp_extract_path="/tmp/temp_extract"):
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        if not os.path.exists(temp_extract_path):
+            os.makedirs(temp_extract_path)
+        zip_ref.extractall(temp_extract_path)
+        extracted_root = os.path.join(temp_extract_path, os.listdir(temp_extract_path)[0])
+        if os.path.exists(destination):
+            shutil.rmtree(destination)
+        shutil.move(extracted_root, destination)
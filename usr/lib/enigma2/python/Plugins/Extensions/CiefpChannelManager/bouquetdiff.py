@@ -0,0 +1,133 @@
+import os
+import shutil
+from difflib import SequenceMatcher
+from urllib.parse import unquote
+from Components.config import config
+
+UPSTREAM_BASE_PREFIXES = ("lamedb", "userbouquet.", "subbouquet.")
+
+class BouquetEntry:
+    def __init__(self, service_line=None, description=None):
+        self.service_line = service_line
+        self.description = description
+        self.key = None
+
+    def lines(self):
+        lines = []
+        if self.service_line:
+            lines.append(self.service_line + "\n")
+        if self.description is not None:
+            lines.append(f"#DESCRIPTION {self.description}\n")
+        return lines
+
+def normalize_ref(service_line, description=None):
+    if not service_line:
+        return "marker:" + (description or "").strip().casefold()
+    parts = service_line.replace("#SERVICE", "", 1).strip().split(":")
+    if len(parts) > 1 and parts[1] == "64":
+        return "marker:" + (description or "").strip().casefold()
+    fields = []
+    for part in parts[:10]:
+        try:
+            fields.append(format(int(part, 16), "X"))
+        except ValueError:
+            fields.append(part.upper())
+    if len(parts) > 10 and parts[10]:
+        fields.append(unquote(parts[10]).strip())
+    return ":".join(fields)
+
+def parse_entries(lines):
+    header = []
+    entries = []
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("#NAME"):
+            header.append(line + "\n")
+        elif line.startswith("#SERVICE"):
+            entries.append(BouquetEntry(line))
+        elif line.startswith("#DESCRIPTION"):
+            description = line.replace("#DESCRIPTION", "", 1).strip()
+            if entries and entries[-1].service_line and entries[-1].description is None:
+                entries[-1].description = description
+            else:
+                entries.append(BouquetEntry(None, description))
+    for entry in entries:
+        entry.key = normalize_ref(entry.service_line, entry.description)
+    return header, entries
+
+class BouquetDiff:
+    def __init__(self, local_lines, remote_lines, base_lines=None):
+        self.header, self.local = parse_entries(local_lines)
+        self.remote = parse_entries(remote_lines)[1]
+        self.has_base = base_lines is not None
+        base_keys = set(entry.key for entry in parse_entries(base_lines)[1]) if self.has_base else set()
+        local_keys = set(entry.key for entry in self.local)
+        remote_keys = set(entry.key for entry in self.remote)
+        self.added = [entry for entry in self.remote if entry.key not in local_keys and entry.key not in base_keys]
+        self.deleted_locally = [entry for entry in self.remote if entry.key not in local_keys and entry.key in base_keys]
+        self.removed = [entry for entry in self.local if entry.key not in remote_keys]
+        matcher = SequenceMatcher(None, [entry.key for entry in self.local], [entry.key for entry in self.remote], autojunk=False)
+        moved_keys = set()
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != "equal":
+                moved_keys.update(entry.key for entry in self.remote[j1:j2] if entry.key in local_keys)
+        self.moved = [entry for entry in self.remote if entry.key in moved_keys]
+
+    def merged_lines(self):
+        local_keys = set(entry.key for entry in self.local)
+        added_keys = set(entry.key for entry in self.added)
+        leading = []
+        after = {}
+        anchor = None
+        for entry in self.remote:
+            if entry.key in local_keys:
+                anchor = entry.key
+            elif entry.key in added_keys:
+                (after.setdefault(anchor, []) if anchor is not None else leading).append(entry)
+        lines = self.header[:]
+        for entry in leading:
+            lines.extend(entry.lines())
+        for entry in self.local:
+            lines.extend(entry.lines())
+            for added in after.pop(entry.key, ()):
+                lines.extend(added.lines())
+        return lines
+
+def upstream_base_path(bouquet_file):
+    return os.path.join(config.plugins.CiefpChannelManager.snapshot_dir.value, "upstream", bouquet_file)
+
+def record_upstream_base(bouquet_file, source_path):
+    base_path = upstream_base_path(bouquet_file)
+    try:
+        os.makedirs(os.path.dirname(base_path), exist_ok=True)
+        shutil.copyfile(source_path, base_path + ".tmp")
+        os.replace(base_path + ".tmp", base_path)
+    except OSError as e:
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Error recording upstream version of {bouquet_file}: {str(e)}\n")
+
+def write_upstream_base(bouquet_file, data):
+    base_path = upstream_base_path(bouquet_file)
+    try:
+        os.makedirs(os.path.dirname(base_path), exist_ok=True)
+        with open(base_path + ".tmp", 'wb') as f:
+            f.write(data)
+        os.replace(base_path + ".tmp", base_path)
+    except OSError as e:
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Error recording upstream version of {bouquet_file}: {str(e)}\n")
+
+def record_upstream_bases(paths):
+    for path in paths:
+        name = os.path.basename(path)
+        if name.startswith(UPSTREAM_BASE_PREFIXES):
+            record_upstream_base(name, path)
+
+def read_upstream_base(bouquet_file):
+    try:
+        with open(upstream_base_path(bouquet_file), 'r', encoding='utf-8', errors='ignore') as f:
+            return f.readlines()
+    except OSError:
+        return None
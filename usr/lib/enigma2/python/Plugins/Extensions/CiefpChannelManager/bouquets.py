@@ -0,0 +1,242 @@
+import os
+import unicodedata
+from collections import Counter
+from .lamedb import service_key_from_ref
+from .watcher import file_version
+
+SERVICE_TYPE_ORDER = {
+    0x01: 0, 0x16: 0, 0x04: 0, 0x05: 0,
+    0x11: 1, 0x19: 1,
+    0x1f: 2, 0x20: 2,
+    0x02: 3, 0x0a: 3,
+}
+
+_collation_cache = {}
+_bouquet_name_cache = {}
+_bouquet_summary_cache = {}
+
+def collation_key(text):
+    key = _collation_cache.get(text)
+    if key is None:
+        decomposed = unicodedata.normalize("NFKD", text)
+        key = "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+        _collation_cache[text] = key
+    return key
+
+def channel_sort_keys(name, ref):
+    name_key = collation_key(name)
+    key = service_key_from_ref(ref) if not ref.startswith("#SERVICE 4097") else None
+    if key:
+        sid, namespace, tsid, onid = key
+        location_key = (0, namespace >> 16, namespace, tsid, onid, sid)
+    else:
+        location_key = (1, 0, 0, 0, 0, 0)
+    parts = ref.split(":")
+    try:
+        service_type = int(parts[2], 16) if not ref.startswith("#SERVICE 4097") else -1
+    except (IndexError, ValueError):
+        service_type = -1
+    type_key = (SERVICE_TYPE_ORDER.get(service_type, 4), service_type, name_key)
+    return {"name": name_key, "location": location_key + (name_key,), "type": type_key}
+
+def referenced_bouquet_files(lines):
+    files = []
+    for line in lines:
+        if "FROM BOUQUET" in line:
+            start = line.find('"') + 1
+            end = line.find('"', start)
+            if start != 0 and end != -1:
+                files.append(line[start:end])
+    return files
+
+def bouquet_satellite_counts(lines, lamedb_index):
+    counts = Counter()
+    for line in lines:
+        if not line.startswith("#SERVICE 1:0:"):
+            continue
+        orbpos = lamedb_index.orbital_position(service_key_from_ref(line.strip()))
+        if orbpos is not None:
+            counts[orbpos] += 1
+    return counts
+
+def read_bouquet_name(path):
+    stamp = file_version(path)
+    if stamp is None:
+        return None
+    cached = _bouquet_name_cache.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        first_line = f.readline().strip()
+    _bouquet_name_cache[path] = (stamp, first_line)
+    return first_line
+
+class BouquetSummary:
+    def __init__(self, name, channels, children):
+        self.name = name
+        self.channels = channels
+        self.children = children
+
+def parse_bouquet_summary(lines):
+    name = None
+    channels = 0
+    children = []
+    for line in lines:
+        if line.startswith("#NAME") and name is None:
+            name = line.replace("#NAME", "", 1).strip()
+        elif line.startswith("#SERVICE"):
+            if "FROM BOUQUET" in line:
+                children.extend(referenced_bouquet_files([line]))
+            elif line.split(":", 2)[1:2] != ["64"]:
+                channels += 1
+    return BouquetSummary(name, channels, children)
+
+class BouquetTree:
+    def __init__(self, changeset=None, base_dir="/etc/enigma2"):
+        self.changeset = changeset
+        self.base_dir = base_dir
+        self.totals = {}
+        self.cycles = []
+
+    def summary(self, bouquet_file):
+        if self.changeset is not None and self.changeset.is_staged(bouquet_file):
+            lines = self.changeset.read_lines(bouquet_file)
+            return parse_bouquet_summary(lines) if lines is not None else None
+        path = os.path.join(self.base_dir, bouquet_file)
+        stamp = file_version(path)
+        if stamp is None:
+            return None
+        cached = _bouquet_summary_cache.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            summary = parse_bouquet_summary(f)
+        _bouquet_summary_cache[path] = (stamp, summary)
+        return summary
+
+    def channel_count(self, bouquet_file, parents=()):
+        totals = self.totals.setdefault(parents, {})
+        if bouquet_file not in totals:
+            self.count_component(bouquet_file, parents, list(parents), {}, [], totals)
+        return totals[bouquet_file]
+
+    def record_cycle(self, loop):
+        start = loop.index(min(loop))
+        cycle = loop[start:] + loop[:start] + (loop[start],)
+        if cycle not in self.cycles:
+            self.cycles.append(cycle)
+
+    def count_component(self, bouquet_file, parents, path, low, stack, totals):
+        # Bouquets that include each other form one component and share a single total
+        index = len(low)
+        low[bouquet_file] = index
+        path.append(bouquet_file)
+        stack.append(bouquet_file)
+        summary = self.summary(bouquet_file)
+        for child in summary.children if summary else ():
+            if child in path:
+                self.record_cycle(tuple(path[path.index(child):]))
+            if child in parents or child in totals:
+                continue
+            if child not in low:
+                self.count_component(child, parents, path, low, stack, totals)
+            if child in stack:
+                low[bouquet_file] = min(low[bouquet_file], low[child])
+        path.pop()
+        if low[bouquet_file] != index:
+            return
+        members = stack[stack.index(bouquet_file):]
+        del stack[stack.index(bouquet_file):]
+        total = 0
+        for member in members:
+            summary = self.summary(member)
+            if summary is None:
+                continue
+            total += summary.channels
+            total += sum(totals.get(child, 0) for child in summary.children if child not in members)
+        for member in members:
+            totals[member] = total
+
+def write_lines_atomic(path, lines):
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+class BouquetChangeSet:
+    def __init__(self, base_dir="/etc/enigma2"):
+        self.base_dir = base_dir
+        self.writes = {}
+        self.deletes = set()
+        self.base_versions = {}
+
+    def __len__(self):
+        return len(self.writes) + len(self.deletes)
+
+    def stage_write(self, file_name, lines):
+        self.deletes.discard(file_name)
+        self.writes[file_name] = list(lines)
+
+    def stage_delete(self, file_name):
+        self.writes.pop(file_name, None)
+        self.deletes.add(file_name)
+
+    def is_staged(self, file_name):
+        return file_name in self.writes or file_name in self.deletes
+
+    def read_lines(self, file_name):
+        if file_name in self.writes:
+            return self.writes[file_name][:]
+        if file_name in self.deletes:
+            return None
+        path = os.path.join(self.base_dir, file_name)
+        self.base_versions.setdefault(file_name, file_version(path))
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.readlines()
+
+    def external_changes(self):
+        changed = []
+        for file_name in sorted(set(self.writes) | self.deletes):
+            if file_name in self.base_versions:
+                if file_version(os.path.join(self.base_dir, file_name)) != self.base_versions[file_name]:
+                    changed.append(file_name)
+        return changed
+
+    def commit(self):
+        tmp_files = []
+        try:
+            for file_name, lines in self.writes.items():
+                path = os.path.join(self.base_dir, file_name)
+                tmp_files.append(path)
+                with open(path + ".tmp", 'w', encoding='utf-8') as f:
+                    f.writelines(lines)
+        except Exception:
+            for path in tmp_files:
+                if os.path.exists(path + ".tmp"):
+                    os.remove(path + ".tmp")
+            raise
+        for path in tmp_files:
+            os.replace(path + ".tmp", path)
+        for file_name in self.deletes:
+            path = os.path.join(self.base_dir, file_name)
+            if os.path.exists(path):
+                os.remove(path)
+            self.base_versions.pop(file_name, None)
+        for file_name in self.writes:
+            self.base_versions[file_name] = file_version(os.path.join(self.base_dir, file_name))
+        committed = len(self)
+        self.writes = {}
+        self.deletes = set()
+        return committed
+
+    def discard(self):
+        self.writes = {}
+        self.deletes = set()
+        self.base_versions = {}
@@ -0,0 +1,46 @@
+from Components.config import config, ConfigInteger, ConfigSelection, ConfigSubsection, ConfigText, ConfigYesNo
+
+PLUGIN_VERSION = "1.6"
+PLUGIN_ICON = "icon.png"
+PLUGIN_NAME = "CiefpChannelManager"
+TMP_DOWNLOAD = "/tmp/ciefp-E2-75E-34W"
+TMP_SELECTED = "/tmp/CiefpChannelManager"
+TMP_PACKAGES = "/tmp/ciefp-packages"
+PLUGIN_DESCRIPTION = "Manage Bouquets and Channels Plugin"
+GITHUB_API_URL = "https://api.github.com/repos/ciefp/ciefpsettings-enigma2-zipped/contents/"
+PLUGIN_VERSION_URL = "https://raw.githubusercontent.com/ciefp/CiefpChannelManager/refs/heads/main/version.txt"
+INSTALLER_URL = "https://raw.githubusercontent.com/ciefp/CiefpChannelManager/main/installer.sh"
+STATIC_NAMES = ["ciefp-E2-75E-34W"]
+PREVIEW_PAGE_SIZE = 20
+LOAD_CHUNK_SIZE = 250
+LOAD_CHUNK_DELAY = 10
+IPTV_POLL_INTERVAL = 200
+IPTV_STATUS_LABELS = {"alive": "[OK] ", "dead": "[DEAD] ", "skipped": "[?] "}
+INSTALL_POLL_INTERVAL = 200
+MIRROR_DEFAULT_PORT = 8765
+MIRROR_DEFAULT_CACHE_DIR = "/media/hdd/ciefp-mirror"
+SNAPSHOT_DEFAULT_DIR = "/home/root/ciefp-snapshots"
+
+config.plugins.CiefpChannelManager = ConfigSubsection()
+config.plugins.CiefpChannelManager.source = ConfigSelection(default="github", choices=[
+    ("github", "GitHub"),
+    ("mirror", "LAN mirror"),
+    ("local", "Local directory"),
+])
+config.plugins.CiefpChannelManager.packages = ConfigText(default=",".join(STATIC_NAMES), fixed_size=False)
+config.plugins.CiefpChannelManager.mirror_url = ConfigText(default=f"http://192.168.1.10:{MIRROR_DEFAULT_PORT}", fixed_size=False)
+config.plugins.CiefpChannelManager.local_path = ConfigText(default=MIRROR_DEFAULT_CACHE_DIR, fixed_size=False)
+config.plugins.CiefpChannelManager.mirror_server = ConfigYesNo(default=False)
+config.plugins.CiefpChannelManager.mirror_port = ConfigInteger(default=MIRROR_DEFAULT_PORT, limits=(1024, 65535))
+config.plugins.CiefpChannelManager.mirror_cache = ConfigText(default=MIRROR_DEFAULT_CACHE_DIR, fixed_size=False)
+config.plugins.CiefpChannelManager.snapshots = ConfigYesNo(default=True)
+config.plugins.CiefpChannelManager.snapshot_dir = ConfigText(default=SNAPSHOT_DEFAULT_DIR, fixed_size=False)
+config.plugins.CiefpChannelManager.snapshot_keep = ConfigInteger(default=10, limits=(1, 100))
+config.plugins.CiefpChannelManager.prefetch = ConfigSelection(default="off", choices=[
+    ("off", "Off"),
+    ("boot", "After boot"),
+    ("nightly", "Nightly"),
+])
+config.plugins.CiefpChannelManager.prefetch_delay = ConfigInteger(default=5, limits=(1, 120))
+config.plugins.CiefpChannelManager.prefetch_hour = ConfigInteger(default=4, limits=(0, 23))
+config.plugins.CiefpChannelManager.prefetch_apply = ConfigYesNo(default=False)
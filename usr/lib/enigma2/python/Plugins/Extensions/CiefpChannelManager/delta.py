@@ -0,0 +1,288 @@
+import hashlib
+import os
+import struct
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from .bouquetdiff import BouquetDiff, read_upstream_base, record_upstream_bases, upstream_base_path, write_upstream_base
+from .network import HTTP_CHUNK_SIZE, fetch_archive, http_get
+from .snapshots import take_snapshot
+from .watcher import ENIGMA2_DIR
+
+DELTA_WORKERS = 4
+EOCD_SEARCH_SIZE = 65536 + 22
+LOCAL_HEADER_SLACK = 1024
+EOCD = struct.Struct("<4s4H2LH")
+CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+EOCD_SIGNATURE = b"PK\x05\x06"
+CENTRAL_SIGNATURE = b"PK\x01\x02"
+LOCAL_SIGNATURE = b"PK\x03\x04"
+UPDATABLE_PREFIXES = ("lamedb", "userbouquet.", "subbouquet.")
+MERGEABLE_PREFIXES = ("userbouquet.", "subbouquet.")
+
+class RangeNotSupported(Exception):
+    pass
+
+class ZipMember:
+    def __init__(self, name, crc, compress_size, file_size, method, header_offset):
+        self.name = name
+        self.crc = crc
+        self.compress_size = compress_size
+        self.file_size = file_size
+        self.method = method
+        self.header_offset = header_offset
+
+def member_file_name(name):
+    parts = name.split("/", 1)
+    return os.path.basename(parts[1] if len(parts) > 1 else parts[0])
+
+def decompress_member(member, data):
+    if member.method == zipfile.ZIP_STORED:
+        content = data
+    elif member.method == zipfile.ZIP_DEFLATED:
+        content = zlib.decompressobj(-15).decompress(data)
+    else:
+        raise Exception(f"Unsupported compression method {member.method} for {member.name}")
+    if zlib.crc32(content) & 0xFFFFFFFF != member.crc:
+        raise Exception(f"CRC mismatch for {member.name}")
+    return content
+
+class RemoteZip:
+    def __init__(self, url):
+        self.url = url
+        self.size = None
+        self.members = {}
+
+    def fetch_range(self, start, end=None):
+        byte_range = f"bytes={start}-{'' if end is None else end}" if start >= 0 else f"bytes={start}"
+        response = http_get(self.url, headers={"Range": byte_range})
+        try:
+            if response.status_code != 206:
+                response.raise_for_status()
+                raise RangeNotSupported(f"{self.url} does not support range requests")
+            content_range = response.headers.get("Content-Range", "")
+            if self.size is None and "/" in content_range:
+                self.size = int(content_range.rsplit("/", 1)[1])
+            return response.content
+        finally:
+            response.close()
+
+    def read_directory(self):
+        tail = self.fetch_range(-EOCD_SEARCH_SIZE)
+        if self.size is None:
+            raise RangeNotSupported(f"{self.url} did not report the archive size")
+        position = tail.rfind(EOCD_SIGNATURE)
+        if position < 0 or position + EOCD.size > len(tail):
+            raise Exception("End of central directory not found")
+        fields = EOCD.unpack_from(tail, position)
+        count, directory_size, directory_offset = fields[4], fields[5], fields[6]
+        if directory_offset == 0xFFFFFFFF or count == 0xFFFF:
+            raise RangeNotSupported("ZIP64 archives are read in full")
+        tail_offset = self.size - len(tail)
+        if directory_offset >= tail_offset:
+            start = directory_offset - tail_offset
+            directory = tail[start:start + directory_size]
+        else:
+            directory = self.fetch_range(directory_offset, directory_offset + directory_size - 1)
+        offset = 0
+        for _ in range(count):
+            fields = CENTRAL_HEADER.unpack_from(directory, offset)
+            if fields[0] != CENTRAL_SIGNATURE:
+                raise Exception("Corrupt central directory")
+            name_length, extra_length, comment_length = fields[10], fields[11], fields[12]
+            name = directory[offset + CENTRAL_HEADER.size:offset + CENTRAL_HEADER.size + name_length].decode("utf-8", "replace")
+            if not name.endswith("/"):
+                self.members[name] = ZipMember(name, fields[7], fields[8], fields[9], fields[4], fields[16])
+            offset += CENTRAL_HEADER.size + name_length + extra_length + comment_length
+        return self.members
+
+    def read(self, member):
+        start = member.header_offset
+        data = self.fetch_range(start, start + LOCAL_HEADER.size + len(member.name.encode("utf-8")) + member.compress_size + LOCAL_HEADER_SLACK - 1)
+        fields = LOCAL_HEADER.unpack_from(data, 0)
+        if fields[0] != LOCAL_SIGNATURE:
+            raise Exception(f"Corrupt local header for {member.name}")
+        data_start = LOCAL_HEADER.size + fields[9] + fields[10]
+        data_end = data_start + member.compress_size
+        if data_end > len(data):
+            data += self.fetch_range(start + len(data), start + data_end - 1)
+        return decompress_member(member, data[data_start:data_end])
+
+class LocalZip:
+    def __init__(self, path):
+        self.path = path
+        self.members = {}
+
+    def read_directory(self):
+        with zipfile.ZipFile(self.path, 'r') as zip_ref:
+            for info in zip_ref.infolist():
+                if not info.is_dir():
+                    self.members[info.filename] = ZipMember(info.filename, info.CRC, info.compress_size,
+                                                            info.file_size, info.compress_type, info.header_offset)
+        return self.members
+
+    def read(self, member):
+        with zipfile.ZipFile(self.path, 'r') as zip_ref:
+            return zip_ref.read(member.name)
+
+def open_settings_zip(download_url):
+    if download_url.startswith("http://") or download_url.startswith("https://"):
+        remote = RemoteZip(download_url)
+        try:
+            remote.read_directory()
+            return remote
+        except RangeNotSupported as e:
+            with open("/tmp/channel_editor_debug.log", 'a') as df:
+                df.write(f"Differential update falling back to full download: {str(e)}\n")
+        local_path = os.path.join("/tmp", f"latest-{hashlib.sha1(download_url.encode('utf-8')).hexdigest()[:12]}.zip")
+        fetch_archive(download_url, local_path)
+    else:
+        local_path = download_url
+    local = LocalZip(local_path)
+    local.read_directory()
+    return local
+
+def file_crc32(path):
+    crc = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HTTP_CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc & 0xFFFFFFFF
+
+class UpdatePlan:
+    def __init__(self):
+        self.changed = []
+        self.modified = []
+        self.untracked = []
+        self.checked = set()
+
+    def unchanged(self):
+        return len(self.checked) - len(self.changed) - len(self.modified) - len(self.untracked)
+
+    def mergeable(self):
+        return [item for item in self.modified + self.untracked
+                if os.path.basename(item[2]).startswith(MERGEABLE_PREFIXES)]
+
+def file_matches(path, size, crc):
+    return os.path.getsize(path) == size and file_crc32(path) == crc
+
+def plan_update(archive, target_dir=ENIGMA2_DIR, exclude=(), plan=None):
+    if plan is None:
+        plan = UpdatePlan()
+    for member in archive.members.values():
+        name = member_file_name(member.name)
+        if not name.startswith(UPDATABLE_PREFIXES) or name in exclude or name in plan.checked:
+            continue
+        target = os.path.join(target_dir, name)
+        if not os.path.exists(target):
+            continue
+        plan.checked.add(name)
+        if file_matches(target, member.file_size, member.crc):
+            continue
+        base = upstream_base_path(name)
+        if not os.path.exists(base):
+            plan.untracked.append((archive, member, target))
+        elif file_matches(base, member.file_size, member.crc):
+            continue
+        elif file_matches(target, os.path.getsize(base), file_crc32(base)):
+            plan.changed.append((archive, member, target))
+        else:
+            plan.modified.append((archive, member, target))
+    return plan
+
+def apply_update(changed, workers=DELTA_WORKERS):
+    def fetch(item):
+        archive, member, target = item
+        with open(target + ".tmp", 'wb') as f:
+            f.write(archive.read(member))
+        return member.compress_size
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            transferred = sum(executor.map(fetch, changed))
+    except Exception:
+        for archive, member, target in changed:
+            if os.path.exists(target + ".tmp"):
+                os.remove(target + ".tmp")
+        raise
+    for archive, member, target in changed:
+        os.replace(target + ".tmp", target)
+    return transferred
+
+def plan_package_update(archives, target_dir=ENIGMA2_DIR):
+    plan = UpdatePlan()
+    merged = {"lamedb"} if len(archives) > 1 else set()
+    for archive in archives:
+        plan_update(archive, target_dir, merged, plan)
+    return plan
+
+def merge_update(items):
+    merged = []
+    for archive, member, target in items:
+        name = os.path.basename(target)
+        if not name.startswith(MERGEABLE_PREFIXES):
+            continue
+        data = archive.read(member)
+        with open(target, 'r', encoding='utf-8', errors='ignore') as f:
+            local_lines = f.readlines()
+        remote_lines = data.decode("utf-8", "ignore").splitlines(True)
+        lines = BouquetDiff(local_lines, remote_lines, read_upstream_base(name)).merged_lines()
+        try:
+            with open(target + ".tmp", 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+        except Exception:
+            if os.path.exists(target + ".tmp"):
+                os.remove(target + ".tmp")
+            raise
+        os.replace(target + ".tmp", target)
+        write_upstream_base(name, data)
+        merged.append(name)
+    return merged
+
+class UpdateJob:
+    def __init__(self, load_archives, target_dir=ENIGMA2_DIR):
+        self.load_archives = load_archives
+        self.target_dir = target_dir
+        self.plan = None
+        self.applied = []
+        self.merged = []
+        self.transferred = 0
+        self.error = None
+        self.thread = None
+
+    def start(self, target, *args):
+        self.error = None
+        self.thread = threading.Thread(target=target, args=args)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start_plan(self):
+        self.start(self.run_plan)
+
+    def start_apply(self, items, merge_items=(), snapshot_reason=None):
+        self.start(self.run_apply, list(items), list(merge_items), snapshot_reason)
+
+    def run_plan(self):
+        try:
+            self.plan = plan_package_update(self.load_archives(), self.target_dir)
+        except Exception as e:
+            self.error = e
+
+    def run_apply(self, items, merge_items, snapshot_reason):
+        try:
+            if snapshot_reason:
+                take_snapshot(snapshot_reason)
+            self.transferred = apply_update(items)
+            record_upstream_bases(target for archive, member, target in items)
+            self.applied = items
+            self.merged = merge_update(merge_items)
+        except Exception as e:
+            self.error = e
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Differential update: {len(self.applied)} files, {self.transferred} bytes transferred, "
+                     f"merged {self.merged}, error: {self.error}\n")
@@ -0,0 +1,1360 @@
+import os
+from bisect import bisect_left, bisect_right
+from enigma import eTimer
+from Components.Pixmap import Pixmap
+from Components.ActionMap import ActionMap
+from Components.Label import Label
+from Components.MenuList import MenuList
+from Screens.ChoiceBox import ChoiceBox
+from Screens.MessageBox import MessageBox
+from Screens.Screen import Screen
+from Screens.VirtualKeyBoard import VirtualKeyBoard
+from Tools.Directories import fileExists
+from enigma import eDVBDB
+from collections import Counter
+from .bouquets import BouquetChangeSet, BouquetTree, bouquet_satellite_counts, channel_sort_keys, collation_key, read_bouquet_name, referenced_bouquet_files, write_lines_atomic
+from .common import IPTV_POLL_INTERVAL, IPTV_STATUS_LABELS, LOAD_CHUNK_DELAY, LOAD_CHUNK_SIZE
+from .lamedb import LamedbIndex, format_orbital_position, load_lamedb, service_key_from_ref
+from .query import QueryError, describe_query, load_service_table, parse_query, query_bouquet_file, query_bouquet_lines, run_query
+from .resolver import get_name_resolver
+from .snapshots import take_snapshot
+from .watcher import file_version
+
+class CiefpChannelEditor(Screen):
+    skin = """
+        <screen position="center,center" size="1200,800" title="..:: Ciefp Channel Editor ::..">
+            <widget name="channel_list" position="0,0" size="700,700" scrollbarMode="showOnDemand" itemHeight="33" font="Regular;28" />
+            <widget name="background" pixmap="/usr/lib/enigma2/python/Plugins/Extensions/CiefpChannelManager/background3.png" position="700,0" size="500,800" />
+            <widget name="status" position="0,710" size="700,50" font="Regular;24" />
+            <widget name="red_button" position="0,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#9F1313" foregroundColor="#000000" />
+            <widget name="green_button" position="170,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#1F771F" foregroundColor="#000000" />
+            <widget name="yellow_button" position="340,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#9F9F13" foregroundColor="#000000" />
+            <widget name="blue_button" position="510,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#1F1F77" foregroundColor="#000000" />
+        </screen>
+    """
+
+    def __init__(self, session, bouquet_file, changeset=None):
+        Screen.__init__(self, session)
+        self.session = session
+        self.bouquet_file = bouquet_file
+        self.changeset = changeset
+        self.channel_list = []
+        self.channel_refs = {}
+        self.selected_channels = []
+        self.marked_channels = []
+        self.move_mode = False
+        self.current_index = 0
+        self.marker_positions = []
+        self.display_map = []
+        self.collapsed = set()
+        self.sub_bouquets = {}
+        self.expanded_bouquets = set()
+        self.sub_bouquet_rows = {}
+        self.bouquet_tree = BouquetTree(changeset)
+        self.bouquet_name = None
+        self.loading = False
+        self.load_lines = []
+        self.load_pos = 0
+        self.service_names = {}
+        self.lamedb_index = None
+        self.load_version = None
+        self.pending_lines = None
+        self.iptv_status = {}
+        self.iptv_total = 0
+        self.iptv_received = 0
+        self.iptv_dead = 0
+        self.iptv_checker = None
+        self.iptv_timer = eTimer()
+        self.iptv_timer.callback.append(self.poll_iptv_results)
+        self.sort_keys = {}
+        self.load_timer = eTimer()
+        self.load_timer.callback.append(self.load_next_chunk)
+        self["channel_list"] = MenuList([])
+        self["background"] = Pixmap()
+        self["status"] = Label("Loading channels...")
+        self["red_button"] = Label("Delete")
+        self["green_button"] = Label("Stage" if changeset is not None else "Save")
+        self["yellow_button"] = Label("Move Mode")
+        self["blue_button"] = Label("Select Group")
+        self["actions"] = ActionMap(["OkCancelActions", "ColorActions", "DirectionActions", "MenuActions"], {
+            "ok": self.select_channel,
+            "cancel": self.exit,
+            "up": self.navigate_or_move_up,
+            "down": self.navigate_or_move_down,
+            "left": self.previous_section,
+            "right": self.next_section,
+            "red": self.delete_selected,
+            "green": self.save_settings,
+            "yellow": self.toggle_move_mode,
+            "blue": self.select_group,
+            "menu": self.show_menu,
+        }, -1)
+        self.onLayoutFinish.append(self.load_channels)
+
+    def load_channels(self):
+        self.channel_list = []
+        self.channel_refs = {}
+        self.marker_positions = []
+        self.collapsed = set()
+        self.sub_bouquets = {}
+        self.expanded_bouquets = set()
+        self.sub_bouquet_rows = {}
+        self.bouquet_tree = BouquetTree(self.changeset)
+        self.sort_keys = {}
+        self.bouquet_name = None
+        self.loading = True
+        self.load_lines = []
+        self.load_pos = 0
+        bouquet_path = os.path.join("/etc/enigma2", self.bouquet_file)
+
+        debug_file = "/tmp/channel_editor_debug.log"
+        with open(debug_file, 'a') as df:
+            df.write(f"Loading bouquet: {bouquet_path}\n")
+
+        if not os.path.exists(bouquet_path) and not (self.changeset and self.changeset.is_staged(self.bouquet_file)):
+            self.loading = False
+            self["status"].setText(f"Error: Bouquet file {self.bouquet_file} not found!")
+            return
+
+        try:
+            if self.changeset is not None:
+                self.load_lines = self.changeset.read_lines(self.bouquet_file) or []
+            else:
+                self.load_version = file_version(bouquet_path)
+                with open(bouquet_path, 'r', encoding='utf-8') as f:
+                    self.load_lines = f.readlines()
+        except Exception as e:
+            self.loading = False
+            self["status"].setText(f"Error loading channels: {str(e)}")
+            with open(debug_file, 'a') as df:
+                df.write(f"Error loading channels: {str(e)}\n")
+            return
+
+        self.service_names = self.resolve_names(self.load_lines)
+        self.current_index = 0
+        self.load_next_chunk()
+
+    def load_next_chunk(self):
+        debug_file = "/tmp/channel_editor_debug.log"
+        debug_lines = []
+        lines = self.load_lines
+        first_chunk = not self.channel_list
+        loaded = len(self.channel_list)
+        i = self.load_pos
+        end = min(len(lines), i + LOAD_CHUNK_SIZE)
+        try:
+            while i < end:
+                line = lines[i].strip()
+                if not line:
+                    i += 1
+                    continue
+                if line.startswith("#NAME"):
+                    self.bouquet_name = line
+                    debug_lines.append(f"Bouquet name: {self.bouquet_name}\n")
+                    i += 1
+                elif line.startswith("#SERVICE"):
+                    parts = line.split(":")
+                    if len(parts) >= 10:
+                        if parts[1] == "64":
+                            debug_lines.append(f"Ignoring marker service: {line}\n")
+                            i += 1
+                            continue
+                        if parts[1] == "7" and "FROM BOUQUET" in line:
+                            child_files = referenced_bouquet_files([line])
+                            if child_files:
+                                channel_name = self.sub_bouquet_name(child_files[0])
+                                self.channel_list.append(channel_name)
+                                self.channel_refs[channel_name] = line
+                                self.sub_bouquets[channel_name] = child_files[0]
+                                debug_lines.append(f"Sub-bouquet: {channel_name}, Service: {line}\n")
+                            i += 1
+                            continue
+                        if parts[0] == "#SERVICE 4097" and parts[1] == "0" and parts[2] == "2":
+                            debug_lines.append(f"Ignoring IPTV service (4097:0:2): {line}\n")
+                            i += 1
+                            if i < len(lines) and lines[i].strip().startswith("#DESCRIPTION"):
+                                i += 1
+                            continue
+                        if parts[0] == "#SERVICE 4097" and parts[1] == "0" and parts[2] == "1":
+                            channel_name = "Unknown IPTV"
+                            if i + 1 < len(lines):
+                                next_line = lines[i + 1].strip()
+                                if next_line.startswith("#DESCRIPTION"):
+                                    channel_name = next_line.replace("#DESCRIPTION", "").strip()
+                                    i += 1
+                            self.channel_list.append(channel_name)
+                            self.channel_refs[channel_name] = line
+                            debug_lines.append(f"IPTV channel: {channel_name}, Service: {line}\n")
+                            i += 1
+                            continue
+                        key = service_key_from_ref(line)
+                        channel_name = self.service_names.get(key) if key else None
+                        if not channel_name:
+                            if key:
+                                channel_name = "Unknown ({0:04x}:{1:08x}:{2:04x}:{3:04x})".format(*key)
+                            else:
+                                channel_name = f"Unknown ({line})"
+                        self.channel_list.append(channel_name)
+                        self.channel_refs[channel_name] = line
+                        debug_lines.append(f"Bouquet service: {line}\n")
+                        debug_lines.append(f"Channel name: {channel_name}\n")
+                    i += 1
+                elif line.startswith("#DESCRIPTION"):
+                    marker_name = line.replace("#DESCRIPTION", "").strip()
+                    self.channel_list.append(marker_name)
+                    self.channel_refs[marker_name] = line
+                    debug_lines.append(f"Marker: {marker_name}\n")
+                    i += 1
+                else:
+                    i += 1
+        except Exception as e:
+            self.loading = False
+            self.load_lines = []
+            self["status"].setText(f"Error loading channels: {str(e)}")
+            with open(debug_file, 'a') as df:
+                df.writelines(debug_lines)
+                df.write(f"Error loading channels: {str(e)}\n")
+            return
+
+        self.load_pos = i
+        self.reindex_markers(loaded, len(self.channel_list))
+        with open(debug_file, 'a') as df:
+            df.writelines(debug_lines)
+
+        if self.load_pos < len(lines):
+            if self.channel_list:
+                self.refresh_loaded_list(first_chunk)
+            self["status"].setText(f"Loading channels... ({len(self.channel_list)} loaded)")
+            self.load_timer.start(LOAD_CHUNK_DELAY, True)
+            return
+
+        self.loading = False
+        self.load_lines = []
+        if not self.channel_list:
+            self["status"].setText("No channels or markers found in bouquet!")
+            return
+        self.refresh_loaded_list(first_chunk)
+        if self.bouquet_tree.cycles:
+            loop = " -> ".join(self.bouquet_tree.cycles[0])
+            self["status"].setText(f"Sub-bouquet loop skipped: {loop}")
+            with open(debug_file, 'a') as df:
+                df.write(f"Sub-bouquet loops in {self.bouquet_file}: {self.bouquet_tree.cycles}\n")
+        else:
+            self["status"].setText("Channels loaded successfully.")
+
+    def refresh_loaded_list(self, first_chunk):
+        if first_chunk:
+            self.display_map = list(range(len(self.channel_list)))
+            self["channel_list"].setList([self.display_entry(channel) for channel in self.channel_list])
+            self["channel_list"].moveToIndex(self.current_index)
+        else:
+            self.update_list()
+
+    def check_loading(self):
+        if self.loading:
+            self["status"].setText("Please wait, channels are still loading...")
+            return True
+        return False
+
+    def resolve_names(self, lines):
+        refs = [line.strip() for line in lines if line.startswith("#SERVICE 1:0:")]
+        try:
+            return get_name_resolver().resolve(refs, self.bouquet_file)
+        except Exception as e:
+            self["status"].setText(f"Error resolving channel names: {str(e)}")
+            with open("/tmp/channel_editor_debug.log", 'a') as df:
+                df.write(f"Error resolving channel names: {str(e)}\n")
+            return {}
+
+    def get_lamedb_index(self):
+        if self.lamedb_index is None:
+            try:
+                self.lamedb_index = load_lamedb("/etc/enigma2/lamedb")
+            except Exception as e:
+                self.lamedb_index = LamedbIndex()
+                with open("/tmp/channel_editor_debug.log", 'a') as df:
+                    df.write(f"Error parsing lamedb: {str(e)}\n")
+        return self.lamedb_index
+
+    def sub_bouquet_name(self, bouquet_file):
+        summary = self.bouquet_tree.summary(bouquet_file)
+        name = summary.name if summary and summary.name else bouquet_file
+        if name in self.channel_refs:
+            name = f"{name} ({bouquet_file})"
+        return name
+
+    def sub_bouquet_count(self, bouquet_file):
+        return self.bouquet_tree.channel_count(bouquet_file, (self.bouquet_file,))
+
+    def get_sub_bouquet_rows(self, bouquet_file):
+        rows = self.sub_bouquet_rows.get(bouquet_file)
+        if rows is not None:
+            return rows
+        rows = []
+        lines = []
+        try:
+            if self.changeset is not None:
+                lines = self.changeset.read_lines(bouquet_file) or []
+            else:
+                with open(os.path.join("/etc/enigma2", bouquet_file), 'r', encoding='utf-8', errors='ignore') as f:
+                    lines = f.readlines()
+        except Exception as e:
+            with open("/tmp/channel_editor_debug.log", 'a') as df:
+                df.write(f"Error reading sub-bouquet {bouquet_file}: {str(e)}\n")
+        refs = [line.strip() for line in lines if line.startswith("#SERVICE 1:0:")]
+        try:
+            names = get_name_resolver().resolve(refs, bouquet_file)
+        except Exception:
+            names = {}
+        previous = ""
+        for line in lines:
+            line = line.strip()
+            if line.startswith("#DESCRIPTION"):
+                description = line.replace("#DESCRIPTION", "", 1).strip()
+                rows.append(description if previous.startswith("#SERVICE 4097") else f"--- {description} ---")
+            elif line.startswith("#SERVICE") and "FROM BOUQUET" in line:
+                for child in referenced_bouquet_files([line]):
+                    summary = self.bouquet_tree.summary(child)
+                    name = summary.name if summary and summary.name else child
+                    rows.append(f"[+] {name} ({self.sub_bouquet_count(child)})")
+            elif line.startswith("#SERVICE 1:0:"):
+                key = service_key_from_ref(line)
+                if key:
+                    rows.append(names.get(key) or "Unknown ({0:04x}:{1:08x}:{2:04x}:{3:04x})".format(*key))
+            previous = line
+        self.sub_bouquet_rows[bouquet_file] = rows
+        return rows
+
+    def current_channel(self):
+        index = self["channel_list"].getSelectedIndex()
+        if index is None or not 0 <= index < len(self.display_map):
+            return None
+        self.current_index = self.display_map[index]
+        return self.channel_list[self.current_index]
+
+    def reindex_markers(self, start, end):
+        lo = bisect_left(self.marker_positions, start)
+        hi = bisect_left(self.marker_positions, end)
+        self.marker_positions[lo:hi] = [i for i in range(start, end) if self.is_marker(self.channel_list[i])]
+
+    def section_bounds(self, index):
+        k = bisect_right(self.marker_positions, index) - 1
+        start = self.marker_positions[k] if k >= 0 else 0
+        end = self.marker_positions[k + 1] if k + 1 < len(self.marker_positions) else len(self.channel_list)
+        return start, end
+
+    def display_position(self, index):
+        position = max(0, bisect_right(self.display_map, index) - 1)
+        if position < len(self.display_map):
+            position = bisect_left(self.display_map, self.display_map[position])
+        return position
+
+    def move_cursor(self, index):
+        position = self.display_position(index)
+        if position < len(self.display_map):
+            self.current_index = self.display_map[position]
+        self["channel_list"].moveToIndex(position)
+
+    def next_section(self):
+        if self.check_loading():
+            return
+        k = bisect_right(self.marker_positions, self.current_index)
+        if k < len(self.marker_positions):
+            self.move_cursor(self.marker_positions[k])
+
+    def previous_section(self):
+        if self.check_loading():
+            return
+        k = bisect_left(self.marker_positions, self.current_index) - 1
+        if k >= 0:
+            self.move_cursor(self.marker_positions[k])
+
+    def select_channel(self):
+        if self.check_loading():
+            return
+        clean_current = self.current_channel()
+        if not clean_current:
+            return
+        debug_file = "/tmp/channel_editor_debug.log"
+        with open(debug_file, 'a') as df:
+            df.write(f"Selecting channel: {clean_current}, Move mode: {self.move_mode}\n")
+        if self.move_mode:
+            if clean_current in self.selected_channels:
+                self.selected_channels.remove(clean_current)
+            else:
+                self.selected_channels.append(clean_current)
+            with open(debug_file, 'a') as df:
+                df.write(f"Selected channels: {self.selected_channels}\n")
+        else:
+            if clean_current in self.marked_channels:
+                self.marked_channels.remove(clean_current)
+            else:
+                self.marked_channels.append(clean_current)
+            with open(debug_file, 'a') as df:
+                df.write(f"Marked channels: {self.marked_channels}\n")
+        self.update_list()
+
+    def toggle_move_mode(self):
+        if self.check_loading():
+            return
+        self.move_mode = not self.move_mode
+        self["yellow_button"].setText("Disable Move" if self.move_mode else "Move Mode")
+        self["status"].setText("Move Mode enabled" if self.move_mode else "Move Mode disabled")
+        if self.move_mode:
+            self.selected_channels = self.marked_channels[:]
+            self.collapsed = set()
+            self.expanded_bouquets = set()
+        else:
+            self.selected_channels = []
+            self.marked_channels = []
+        debug_file = "/tmp/channel_editor_debug.log"
+        with open(debug_file, 'a') as df:
+            df.write(f"Toggle move mode: move_mode={self.move_mode}, selected_channels={self.selected_channels}, marked_channels={self.marked_channels}\n")
+        self.update_list()
+
+    def delete_selected(self):
+        if self.check_loading():
+            return
+        debug_file = "/tmp/channel_editor_debug.log"
+        channels_to_delete = self.selected_channels if self.move_mode else self.marked_channels
+        if not channels_to_delete:
+            self.session.open(
+                MessageBox,
+                "No channels or markers selected to delete.",
+                MessageBox.TYPE_INFO,
+                timeout=5
+            )
+            with open(debug_file, 'a') as df:
+                df.write(f"No channels to delete. Selected: {self.selected_channels}, Marked: {self.marked_channels}\n")
+            return
+        with open(debug_file, 'a') as df:
+            df.write(f"Deleting channels: {channels_to_delete}\n")
+        delete_set = set(channels_to_delete)
+        deleted = [i for i, ch in enumerate(self.channel_list) if ch in delete_set]
+        self.marker_positions = [pos - bisect_left(deleted, pos) for pos in self.marker_positions
+                                 if self.channel_list[pos] not in delete_set]
+        self.channel_list = [ch for ch in self.channel_list if ch not in delete_set]
+        self.collapsed &= set(self.channel_list[pos] for pos in self.marker_positions)
+        self.current_index = min(self.current_index, max(0, len(self.channel_list) - 1))
+        for ch in channels_to_delete:
+            if ch in self.channel_refs:
+                del self.channel_refs[ch]
+        self.selected_channels = []
+        self.marked_channels = []
+        self.update_list()
+        if not self.channel_list:
+            self["status"].setText("No channels or markers left in bouquet!")
+        else:
+            self["status"].setText(f"Deleted {len(channels_to_delete)} items.")
+        with open(debug_file, 'a') as df:
+            df.write(f"After deletion, channel_list: {self.channel_list[:5]}...\n")
+
+    def select_group(self):
+        if self.check_loading():
+            return
+        clean_current = self.current_channel()
+        if not clean_current:
+            return
+        debug_file = "/tmp/channel_editor_debug.log"
+        if clean_current not in self.channel_refs or not self.channel_refs[clean_current].startswith("#DESCRIPTION"):
+            self.session.open(
+                MessageBox,
+                "Please select a marker first.",
+                MessageBox.TYPE_INFO,
+                timeout=5
+            )
+            return
+        start, end = self.section_bounds(self.current_index)
+        group = self.channel_list[start:end]
+        self.selected_channels = group
+        self.marked_channels = group
+        with open(debug_file, 'a') as df:
+            df.write(f"Selected group: {group}\n")
+        self["status"].setText(f"Selected group: {len(group)} items.")
+        self.update_list()
+
+    def show_menu(self):
+        if self.check_loading():
+            return
+        menu = [
+            ("Sort by name", "name"),
+            ("Sort by satellite / transponder / SID", "location"),
+            ("Sort by service type", "type"),
+            ("Mark channels by satellite", "satellite"),
+            ("Collapse / expand this section or sub-bouquet", "section_toggle"),
+            ("Open this sub-bouquet", "sub_bouquet"),
+            ("Collapse all sections", "section_collapse"),
+            ("Expand all sections", "section_expand"),
+            ("Move section up", "section_up"),
+            ("Move section down", "section_down"),
+            ("Sort this section by name", "section_sort"),
+            ("Delete this section", "section_delete"),
+            ("Check IPTV streams", "iptv_check"),
+            ("Mark dead IPTV streams", "iptv_dead"),
+        ]
+        self.session.openWithCallback(self.menu_callback, ChoiceBox, title="Channel Editor", list=menu)
+
+    def menu_callback(self, choice):
+        if not choice:
+            return
+        if choice[1] in ("name", "location", "type"):
+            self.sort_channels(choice[1])
+        elif choice[1] == "satellite":
+            self.choose_satellite()
+        elif choice[1].startswith("section_"):
+            self.section_action(choice[1][8:])
+        elif choice[1] == "sub_bouquet":
+            self.open_sub_bouquet()
+        elif choice[1] == "iptv_check":
+            self.check_iptv_streams()
+        elif choice[1] == "iptv_dead":
+            self.mark_dead_streams()
+
+    def open_sub_bouquet(self):
+        channel = self.current_channel()
+        bouquet_file = self.sub_bouquets.get(channel)
+        if not bouquet_file:
+            self["status"].setText("Please select a sub-bouquet first.")
+            return
+        self.session.openWithCallback(self.sub_bouquet_closed, CiefpChannelEditor, bouquet_file, self.changeset)
+
+    def sub_bouquet_closed(self, *args):
+        self.sub_bouquet_rows = {}
+        self.bouquet_tree = BouquetTree(self.changeset)
+        self.update_list()
+
+    def get_orbital_position(self, channel):
+        ref = self.channel_refs.get(channel, "")
+        if not ref.startswith("#SERVICE 1:0:"):
+            return None
+        return self.get_lamedb_index().orbital_position(service_key_from_ref(ref))
+
+    def choose_satellite(self):
+        counts = Counter(self.get_orbital_position(channel) for channel in self.channel_list)
+        counts.pop(None, None)
+        if not counts:
+            self["status"].setText("No satellite information available.")
+            return
+        menu = [(f"{format_orbital_position(orbpos)}  ({count} channels)", orbpos)
+                for orbpos, count in sorted(counts.items(), key=lambda item: -item[1])]
+        self.session.openWithCallback(self.satellite_chosen, ChoiceBox, title="Mark channels by satellite", list=menu)
+
+    def satellite_chosen(self, choice):
+        if not choice:
+            return
+        group = [channel for channel in self.channel_list if self.get_orbital_position(channel) == choice[1]]
+        self.marked_channels = group
+        self.selected_channels = group[:] if self.move_mode else []
+        self["status"].setText(f"Marked {len(group)} channels on {format_orbital_position(choice[1])}.")
+        self.update_list()
+
+    def get_sort_key(self, channel, mode):
+        keys = self.sort_keys.get(channel)
+        if keys is None:
+            keys = channel_sort_keys(channel, self.channel_refs.get(channel, ""))
+            self.sort_keys[channel] = keys
+        return keys[mode]
+
+    def is_marker(self, channel):
+        return self.channel_refs.get(channel, "").startswith("#DESCRIPTION")
+
+    def sort_channels(self, mode):
+        sorted_list = []
+        section = []
+        for channel in self.channel_list:
+            if self.is_marker(channel):
+                section.sort(key=lambda ch: self.get_sort_key(ch, mode))
+                sorted_list.extend(section)
+                sorted_list.append(channel)
+                section = []
+            else:
+                section.append(channel)
+        section.sort(key=lambda ch: self.get_sort_key(ch, mode))
+        sorted_list.extend(section)
+        self.channel_list = sorted_list
+        self.update_list()
+        self["status"].setText("Channels sorted within their marker sections.")
+
+    def display_entry(self, channel):
+        prefix = ""
+        if self.move_mode and channel in self.selected_channels:
+            prefix = ">> "
+        elif channel in self.marked_channels:
+            prefix = "+ "
+        status = self.iptv_status.get(channel)
+        if status:
+            prefix += IPTV_STATUS_LABELS.get(status, "")
+        if channel in self.sub_bouquets:
+            expanded = "[-]" if channel in self.expanded_bouquets else "[+]"
+            return f"{prefix}{expanded} {channel} ({self.sub_bouquet_count(self.sub_bouquets[channel])})"
+        return prefix + channel
+
+    def update_list(self):
+        display_list = []
+        self.display_map = []
+        i = 0
+        total = len(self.channel_list)
+        while i < total:
+            channel = self.channel_list[i]
+            self.display_map.append(i)
+            if channel in self.collapsed:
+                end = self.section_bounds(i)[1]
+                display_list.append(f"[+] {self.display_entry(channel)} ({end - i - 1})")
+                i = end
+            else:
+                display_list.append(self.display_entry(channel))
+                if channel in self.expanded_bouquets and channel in self.sub_bouquets:
+                    for row in self.get_sub_bouquet_rows(self.sub_bouquets[channel]):
+                        self.display_map.append(i)
+                        display_list.append("      " + row)
+                i += 1
+        debug_file = "/tmp/channel_editor_debug.log"
+        with open(debug_file, 'a') as df:
+            df.write(f"Updating list, display_list: {display_list[:5]}...\n")
+        self["channel_list"].setList(display_list)
+        self.move_cursor(self.current_index)
+
+    def section_action(self, action):
+        self.current_channel()
+        if self.move_mode and action in ("toggle", "collapse"):
+            self["status"].setText("Disable Move Mode to collapse sections.")
+            return
+        if action == "toggle" and self.channel_list and self.channel_list[self.current_index] in self.sub_bouquets:
+            self.expanded_bouquets ^= {self.channel_list[self.current_index]}
+            self.update_list()
+            return
+        if action == "collapse":
+            self.collapsed = set(self.channel_list[pos] for pos in self.marker_positions)
+            self.expanded_bouquets = set()
+            self.update_list()
+            return
+        if action == "expand":
+            self.collapsed = set()
+            self.update_list()
+            return
+        start, end = self.section_bounds(self.current_index)
+        if not self.channel_list or not self.is_marker(self.channel_list[start]):
+            self["status"].setText("Please select a channel inside a marker section first.")
+            return
+        marker = self.channel_list[start]
+        if action == "toggle":
+            self.collapsed ^= {marker}
+            self.current_index = start
+        elif action == "up":
+            if start == 0:
+                return
+            previous_start = self.section_bounds(start - 1)[0]
+            self.channel_list[previous_start:end] = self.channel_list[start:end] + self.channel_list[previous_start:start]
+            self.reindex_markers(previous_start, end)
+            self.current_index = previous_start
+        elif action == "down":
+            if end >= len(self.channel_list):
+                return
+            next_end = self.section_bounds(end)[1]
+            self.channel_list[start:next_end] = self.channel_list[end:next_end] + self.channel_list[start:end]
+            self.reindex_markers(start, next_end)
+            self.current_index = start + next_end - end
+        elif action == "sort":
+            self.channel_list[start + 1:end] = sorted(self.channel_list[start + 1:end],
+                                                      key=lambda ch: self.get_sort_key(ch, "name"))
+        elif action == "delete":
+            removed = self.channel_list[start:end]
+            del self.channel_list[start:end]
+            k = bisect_left(self.marker_positions, start)
+            self.marker_positions[k:] = [pos - (end - start) for pos in self.marker_positions[k + 1:]]
+            self.collapsed.discard(marker)
+            for channel in removed:
+                self.channel_refs.pop(channel, None)
+            removed_set = set(removed)
+            self.marked_channels = [ch for ch in self.marked_channels if ch not in removed_set]
+            self.selected_channels = [ch for ch in self.selected_channels if ch not in removed_set]
+            self.current_index = min(start, max(0, len(self.channel_list) - 1))
+            self["status"].setText(f"Deleted section {marker} ({len(removed)} items).")
+        self.update_list()
+
+    def navigate_or_move_up(self):
+        if self.move_mode and self.selected_channels:
+            new_list = self.channel_list[:]
+            moved = False
+            selected_indices = [new_list.index(channel) for channel in self.selected_channels if channel in new_list]
+            if not selected_indices:
+                return
+            min_idx = min(selected_indices)
+            if min_idx == 0:
+                return
+            selected_group = [new_list[i] for i in sorted(selected_indices)]
+            for idx in sorted(selected_indices, reverse=True):
+                new_list.pop(idx)
+            insert_idx = min_idx - 1
+            for channel in selected_group:
+                new_list.insert(insert_idx, channel)
+                insert_idx += 1
+                moved = True
+            if self.current_index in selected_indices:
+                self.current_index -= 1
+            elif self.current_index > min_idx:
+                self.current_index -= len(selected_indices)
+            if moved:
+                self.channel_list = new_list
+                self.reindex_markers(min_idx - 1, max(selected_indices) + 1)
+                self.update_list()
+        else:
+            position = self.display_position(self.current_index)
+            if position > 0:
+                self.move_cursor(self.display_map[position - 1])
+
+    def navigate_or_move_down(self):
+        if self.move_mode and self.selected_channels:
+            new_list = self.channel_list[:]
+            moved = False
+            selected_indices = [new_list.index(channel) for channel in self.selected_channels if channel in new_list]
+            if not selected_indices:
+                return
+            max_idx = max(selected_indices)
+            if max_idx == len(new_list) - 1:
+                return
+            selected_group = [new_list[i] for i in sorted(selected_indices)]
+            for idx in sorted(selected_indices, reverse=True):
+                new_list.pop(idx)
+            insert_idx = max_idx + 1 - len(selected_indices) + 1
+            for channel in selected_group:
+                new_list.insert(insert_idx, channel)
+                insert_idx += 1
+                moved = True
+            if self.current_index in selected_indices:
+                self.current_index += 1
+            elif self.current_index >= max_idx - len(selected_indices) + 1:
+                self.current_index += len(selected_indices)
+            if moved:
+                self.channel_list = new_list
+                self.reindex_markers(min(selected_indices), max_idx + 2)
+                self.update_list()
+        else:
+            position = bisect_right(self.display_map, self.current_index)
+            if position < len(self.display_map):
+                self.move_cursor(self.display_map[position])
+
+    def save_settings(self):
+        if self.check_loading():
+            return
+        if not self.channel_list:
+            self["status"].setText("No channels to save!")
+            return
+        bouquet_path = os.path.join("/etc/enigma2", self.bouquet_file)
+        try:
+            new_lines = []
+            if self.bouquet_name:
+                new_lines.append(self.bouquet_name + "\n")
+            for channel in self.channel_list:
+                line = self.channel_refs.get(channel)
+                if line:
+                    new_lines.append(line + "\n")
+                    if line.startswith("#SERVICE 4097:0:1"):
+                        new_lines.append(f"#DESCRIPTION {channel}\n")
+            debug_file = "/tmp/channel_editor_debug.log"
+            with open(debug_file, 'a') as df:
+                df.write(f"Saving bouquet: {bouquet_path}\n")
+                df.write(f"Bouquet name: {self.bouquet_name}\n")
+                df.write(f"Lines to save: {new_lines[:5]}...\n")
+            if self.changeset is not None:
+                self.changeset.stage_write(self.bouquet_file, new_lines)
+                self["status"].setText("Changes staged. Save in Bouquet Editor to apply.")
+                return
+            if file_version(bouquet_path) != self.load_version:
+                self.pending_lines = new_lines
+                self.session.openWithCallback(
+                    self.overwrite_confirmed,
+                    MessageBox,
+                    f"{self.bouquet_file} was modified by another program after it was loaded. Overwrite it?",
+                    MessageBox.TYPE_YESNO
+                )
+                return
+            self.write_bouquet(new_lines)
+        except Exception as e:
+            self["status"].setText(f"Error saving settings: {str(e)}")
+            with open(debug_file, 'a') as df:
+                df.write(f"Error saving settings: {str(e)}\n")
+
+    def overwrite_confirmed(self, result):
+        new_lines, self.pending_lines = self.pending_lines, None
+        if result and new_lines:
+            try:
+                self.write_bouquet(new_lines)
+            except Exception as e:
+                self["status"].setText(f"Error saving settings: {str(e)}")
+        else:
+            self["status"].setText("Save cancelled.")
+
+    def write_bouquet(self, new_lines):
+        bouquet_path = os.path.join("/etc/enigma2", self.bouquet_file)
+        take_snapshot(f"Edit {self.bouquet_file}")
+        write_lines_atomic(bouquet_path, new_lines)
+        self.load_version = file_version(bouquet_path)
+        self.reload_settings()
+        self["status"].setText("Settings saved successfully!")
+
+    def reload_settings(self):
+        try:
+            eDVBDB.getInstance().reloadServicelist()
+            eDVBDB.getInstance().reloadBouquets()
+            self.session.open(
+                MessageBox,
+                "Settings saved and reloaded successfully!",
+                MessageBox.TYPE_INFO,
+                timeout=5
+            )
+        except Exception as e:
+            self.session.open(
+                MessageBox,
+                f"Reload failed: {str(e)}",
+                MessageBox.TYPE_ERROR,
+                timeout=5
+            )
+
+    def check_iptv_streams(self):
+        from .iptv import IptvChecker, iptv_url_from_ref
+        if self.iptv_checker:
+            self.iptv_checker.cancel()
+        streams = [(channel, iptv_url_from_ref(self.channel_refs[channel])) for channel in self.channel_list
+                   if self.channel_refs.get(channel, "").startswith("#SERVICE 4097")]
+        if not streams:
+            self["status"].setText("No IPTV streams in this bouquet.")
+            return
+        self.iptv_status = {}
+        self.iptv_total = len(streams)
+        self.iptv_received = 0
+        self.iptv_dead = 0
+        self.iptv_checker = IptvChecker(streams)
+        self.iptv_checker.start()
+        self["status"].setText(f"Checking {self.iptv_total} IPTV streams...")
+        self.iptv_timer.start(IPTV_POLL_INTERVAL, False)
+
+    def poll_iptv_results(self):
+        if not self.iptv_checker:
+            self.iptv_timer.stop()
+            return
+        results = self.iptv_checker.get_results()
+        if not results:
+            return
+        self.iptv_status.update(results)
+        self.iptv_received += len(results)
+        self.iptv_dead += sum(1 for key, status in results if status == "dead")
+        if self.iptv_received >= self.iptv_total:
+            self.iptv_timer.stop()
+            self.iptv_checker = None
+            self["status"].setText(f"IPTV check finished: {self.iptv_dead} of {self.iptv_total} streams dead.")
+        else:
+            self["status"].setText(f"Checking IPTV streams: {self.iptv_received}/{self.iptv_total}, {self.iptv_dead} dead")
+        self.update_list()
+
+    def mark_dead_streams(self):
+        dead = [channel for channel in self.channel_list if self.iptv_status.get(channel) == "dead"]
+        if not dead:
+            self["status"].setText("No dead IPTV streams found. Run the IPTV check first.")
+            return
+        self.marked_channels = dead
+        self.selected_channels = dead[:] if self.move_mode else []
+        self["status"].setText(f"Marked {len(dead)} dead streams. Press Delete to remove them.")
+        self.update_list()
+
+    def exit(self):
+        self.load_timer.stop()
+        self.iptv_timer.stop()
+        if self.iptv_checker:
+            self.iptv_checker.cancel()
+        self.close()
+
+class CiefpBouquetEditor(Screen):
+    skin = """
+        <screen position="center,center" size="1200,800" title="..:: Ciefp Bouquet Editor ::..">
+            <widget name="bouquet_list" position="0,0" size="700,700" scrollbarMode="showOnDemand" itemHeight="33" font="Regular;28" />
+            <widget name="background" pixmap="/usr/lib/enigma2/python/Plugins/Extensions/CiefpChannelManager/background2.png" position="700,0" size="500,800" />
+            <widget name="status" position="0,710" size="700,50" font="Regular;24" />
+            <widget name="red_button" position="0,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#9F1313" foregroundColor="#000000" />
+            <widget name="green_button" position="170,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#1F771F" foregroundColor="#000000" />
+            <widget name="yellow_button" position="340,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#9F9F13" foregroundColor="#000000" />
+            <widget name="blue_button" position="510,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#1F1F77" foregroundColor="#000000" />
+        </screen>
+    """
+
+    def __init__(self, session):
+        Screen.__init__(self, session)
+        self.session = session
+        self.bouquet_list = []
+        self.bouquet_names = {}
+        self.selected_bouquets = []
+        self.move_mode = False
+        self.current_index = 0
+        self.changeset = BouquetChangeSet()
+        self.bouquet_tree = BouquetTree(self.changeset)
+        self.bouquet_satellites = {}
+        self.last_query = ""
+        self.query_rows = []
+        self.query_grouped = False
+        self["bouquet_list"] = MenuList([])
+        self["background"] = Pixmap()
+        self["status"] = Label("Loading bouquets...")
+        self["red_button"] = Label("Delete")
+        self["green_button"] = Label("Save")
+        self["yellow_button"] = Label("Move Mode")
+        self["blue_button"] = Label("Channels")
+        self["actions"] = ActionMap(["OkCancelActions", "ColorActions", "DirectionActions", "MenuActions"], {
+            "ok": self.toggle_selection,
+            "cancel": self.exit,
+            "up": self.navigate_or_move_up,
+            "down": self.navigate_or_move_down,
+            "red": self.delete_selected_bouquets,
+            "green": self.save_settings,
+            "yellow": self.toggle_move_mode,
+            "blue": self.open_channel_editor,
+            "menu": self.show_menu,
+        }, -1)
+        self.onLayoutFinish.append(self.load_bouquets)
+
+    def load_bouquets(self):
+        self.bouquet_names = {}
+        bouquets_file = "/etc/enigma2/bouquets.tv"
+        bouquet_order = []
+        bouquet_display_list = []
+        name_to_file = {}
+        debug_file = "/tmp/channel_editor_debug.log"
+
+        with open(debug_file, 'a') as df:
+            df.write(f"Loading bouquets from: {bouquets_file}\n")
+
+        if fileExists(bouquets_file):
+            for line in self.changeset.read_lines("bouquets.tv") or []:
+                if "FROM BOUQUET" in line:
+                    start = line.find('"') + 1
+                    end = line.find('"', start)
+                    if start != -1 and end != -1:
+                        bouquet_file = line[start:end]
+                        bouquet_order.append(bouquet_file)
+                        with open(debug_file, 'a') as df:
+                            df.write(f"Found bouquet file: {bouquet_file}\n")
+        else:
+            self["status"].setText("Error: bouquets.tv not found!")
+            with open(debug_file, 'a') as df:
+                df.write("Error: bouquets.tv not found!\n")
+            return
+
+        for bouquet_file in bouquet_order:
+            file_path = os.path.join("/etc/enigma2", bouquet_file)
+            if os.path.exists(file_path):
+                try:
+                    first_line = read_bouquet_name(file_path)
+                    if first_line.startswith("#NAME"):
+                        display_name = first_line.replace("#NAME", "", 1).strip()
+                        self.bouquet_names[display_name] = bouquet_file
+                        name_to_file[bouquet_file] = display_name
+                        with open(debug_file, 'a') as df:
+                            df.write(f"Loaded bouquet: {display_name} -> {bouquet_file}\n")
+                except Exception as e:
+                    self["status"].setText(f"Error reading {bouquet_file}: {str(e)}")
+                    with open(debug_file, 'a') as df:
+                        df.write(f"Error reading {bouquet_file}: {str(e)}\n")
+                    return
+
+        for bouquet_file in bouquet_order:
+            if bouquet_file in name_to_file:
+                bouquet_display_list.append(name_to_file[bouquet_file])
+
+        if not bouquet_display_list:
+            self["status"].setText("No valid bouquet files found!")
+            with open(debug_file, 'a') as df:
+                df.write("No valid bouquet files found!\n")
+            return
+
+        self.bouquet_list = bouquet_display_list
+        self.bouquet_tree = BouquetTree(self.changeset)
+        self.current_index = 0
+        self.update_list()
+        if self.bouquet_tree.cycles:
+            self["status"].setText(f"Sub-bouquet loop skipped: {' -> '.join(self.bouquet_tree.cycles[0])}")
+        else:
+            self["status"].setText("Bouquets loaded successfully.")
+        with open(debug_file, 'a') as df:
+            df.write(f"Bouquet list: {bouquet_display_list}\n")
+            df.write("Bouquets loaded successfully.\n")
+
+    def toggle_selection(self):
+        if not self.bouquet_list:
+            return
+        current_bouquet = self.bouquet_list[self.current_index]
+        if current_bouquet in self.selected_bouquets:
+            self.selected_bouquets.remove(current_bouquet)
+        else:
+            self.selected_bouquets.append(current_bouquet)
+        debug_file = "/tmp/channel_editor_debug.log"
+        with open(debug_file, 'a') as df:
+            df.write(f"Toggle selection: {current_bouquet}, Selected bouquets: {self.selected_bouquets}\n")
+        self.update_list()
+
+    def delete_selected_bouquets(self):
+        debug_file = "/tmp/channel_editor_debug.log"
+        if not self.selected_bouquets:
+            self.session.open(
+                MessageBox,
+                "No bouquets selected to delete.",
+                MessageBox.TYPE_INFO,
+                timeout=5
+            )
+            with open(debug_file, 'a') as df:
+                df.write(f"No bouquets to delete. Selected: {self.selected_bouquets}\n")
+            return
+        with open(debug_file, 'a') as df:
+            df.write(f"Deleting bouquets: {self.selected_bouquets}\n")
+        bouquets_to_delete = self.selected_bouquets[:]
+        for bouquet in bouquets_to_delete:
+            bouquet_file = self.bouquet_names.get(bouquet)
+            if bouquet_file:
+                self.changeset.stage_delete(bouquet_file)
+                with open(debug_file, 'a') as df:
+                    df.write(f"Staged deletion: {bouquet_file}\n")
+        self.bouquet_list = [bq for bq in self.bouquet_list if bq not in bouquets_to_delete]
+        self.selected_bouquets = []
+        self.bouquet_names = {name: file for name, file in self.bouquet_names.items() if name in self.bouquet_list}
+        self.update_list()
+        if not self.bouquet_list:
+            self["status"].setText("No bouquets left! Save to apply.")
+        else:
+            self["status"].setText(f"Deleted {len(bouquets_to_delete)} bouquets. Save to apply {len(self.changeset)} staged changes.")
+        with open(debug_file, 'a') as df:
+            df.write(f"After deletion, bouquet_list: {self.bouquet_list[:5]}...\n")
+
+    def toggle_move_mode(self):
+        self.move_mode = not self.move_mode
+        self["yellow_button"].setText("Disable Move" if self.move_mode else "Move Mode")
+        self["status"].setText("Move Mode enabled" if self.move_mode else "Move Mode disabled")
+        if not self.move_mode:
+            self.selected_bouquets = []
+        debug_file = "/tmp/channel_editor_debug.log"
+        with open(debug_file, 'a') as df:
+            df.write(f"Toggle move mode: move_mode={self.move_mode}, selected_bouquets={self.selected_bouquets}\n")
+        self.update_list()
+
+    def show_menu(self):
+        menu = [
+            ("Sort by name", "name"),
+            ("Sort by file name", "file"),
+            ("Mark bouquets by satellite", "satellite"),
+            ("Create bouquet from query", "query"),
+        ]
+        self.session.openWithCallback(self.menu_callback, ChoiceBox, title="Bouquet Editor", list=menu)
+
+    def menu_callback(self, choice):
+        if not choice:
+            return
+        if choice[1] in ("name", "file"):
+            self.sort_bouquets(choice[1])
+        elif choice[1] == "satellite":
+            self.choose_satellite()
+        elif choice[1] == "query":
+            self.session.openWithCallback(
+                self.query_entered,
+                VirtualKeyBoard,
+                title="Query, e.g. fta and type in hd,uhd and sat=13.0E",
+                text=self.last_query
+            )
+
+    def query_entered(self, text):
+        if not text:
+            return
+        self.last_query = text
+        try:
+            conditions = parse_query(text)
+            table = load_service_table()
+            self.query_rows = run_query(table, conditions)
+        except QueryError as e:
+            self["status"].setText(f"Query error: {str(e)}")
+            return
+        except Exception as e:
+            self["status"].setText(f"Error running query: {str(e)}")
+            return
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Query '{describe_query(conditions)}' matched {len(self.query_rows)} of {len(table)} services\n")
+        if not self.query_rows:
+            self["status"].setText(f"No services match: {describe_query(conditions)}")
+            return
+        menu = [
+            (f"Sorted by name ({len(self.query_rows)} channels)", False),
+            (f"Grouped by provider ({len(self.query_rows)} channels)", True),
+        ]
+        self.session.openWithCallback(self.query_layout_chosen, ChoiceBox, title="Create bouquet from query", list=menu)
+
+    def query_layout_chosen(self, choice):
+        if not choice:
+            return
+        self.query_grouped = choice[1]
+        self.session.openWithCallback(self.query_bouquet_named, VirtualKeyBoard, title="Bouquet name", text=self.last_query)
+
+    def query_bouquet_named(self, bouquet_name):
+        if not bouquet_name:
+            return
+        bouquet_name = bouquet_name.strip()
+        if not bouquet_name:
+            return
+        bouquet_file = query_bouquet_file(bouquet_name)
+        if self.bouquet_names.get(bouquet_name, bouquet_file) != bouquet_file:
+            self["status"].setText(f"A bouquet named {bouquet_name} already exists. Choose another name.")
+            self.session.openWithCallback(self.query_bouquet_named, VirtualKeyBoard, title="Bouquet name", text=bouquet_name)
+            return
+        table = load_service_table()
+        self.changeset.stage_write(bouquet_file, query_bouquet_lines(table, self.query_rows, bouquet_name, self.query_grouped))
+        lines = self.changeset.read_lines("bouquets.tv") or ["#NAME User - Bouquets (TV)\n"]
+        if bouquet_file not in referenced_bouquet_files(lines):
+            if lines and not lines[-1].endswith("\n"):
+                lines[-1] += "\n"
+            lines.append(f'#SERVICE 1:7:1:0:0:0:0:0:0:0:FROM BOUQUET "{bouquet_file}" ORDER BY bouquet\n')
+            self.changeset.stage_write("bouquets.tv", lines)
+        for display_name, file_name in list(self.bouquet_names.items()):
+            if file_name == bouquet_file:
+                del self.bouquet_names[display_name]
+                self.bouquet_list.remove(display_name)
+        self.bouquet_names[bouquet_name] = bouquet_file
+        self.bouquet_list.append(bouquet_name)
+        self.bouquet_satellites.pop(bouquet_file, None)
+        self.bouquet_tree = BouquetTree(self.changeset)
+        self.current_index = len(self.bouquet_list) - 1
+        self.update_list()
+        self["status"].setText(f"Created {bouquet_name} with {len(self.query_rows)} channels. Press Save to apply.")
+
+    def get_bouquet_satellites(self, bouquet_file):
+        counts = self.bouquet_satellites.get(bouquet_file)
+        if counts is None:
+            lamedb_index = load_lamedb("/etc/enigma2/lamedb")
+            counts = bouquet_satellite_counts(self.changeset.read_lines(bouquet_file) or [], lamedb_index)
+            self.bouquet_satellites[bouquet_file] = counts
+        return counts
+
+    def choose_satellite(self):
+        channel_counts = Counter()
+        bouquet_counts = Counter()
+        for bouquet in self.bouquet_list:
+            counts = self.get_bouquet_satellites(self.bouquet_names.get(bouquet))
+            channel_counts.update(counts)
+            bouquet_counts.update(counts.keys())
+        if not channel_counts:
+            self["status"].setText("No satellite information available.")
+            return
+        menu = [(f"{format_orbital_position(orbpos)}  ({bouquet_counts[orbpos]} bouquets, {count} channels)", orbpos)
+                for orbpos, count in sorted(channel_counts.items(), key=lambda item: -item[1])]
+        self.session.openWithCallback(self.satellite_chosen, ChoiceBox, title="Mark bouquets by satellite", list=menu)
+
+    def satellite_chosen(self, choice):
+        if not choice:
+            return
+        self.selected_bouquets = [bouquet for bouquet in self.bouquet_list
+                                  if choice[1] in self.get_bouquet_satellites(self.bouquet_names.get(bouquet))]
+        self["status"].setText(f"Marked {len(self.selected_bouquets)} bouquets on {format_orbital_position(choice[1])}.")
+        self.update_list()
+
+    def sort_bouquets(self, mode):
+        if mode == "file":
+            self.bouquet_list.sort(key=lambda bq: collation_key(self.bouquet_names.get(bq, bq)))
+        else:
+            self.bouquet_list.sort(key=collation_key)
+        self.update_list()
+        self["status"].setText("Bouquets sorted. Press Save to apply.")
+
+    def update_list(self):
+        display_list = []
+        for bouquet in self.bouquet_list:
+            prefix = ""
+            if self.move_mode and bouquet in self.selected_bouquets:
+                prefix = ">> "
+            elif bouquet in self.selected_bouquets:
+                prefix = "+ "
+            display_list.append(prefix + self.bouquet_label(bouquet))
+        debug_file = "/tmp/channel_editor_debug.log"
+        with open(debug_file, 'a') as df:
+            df.write(f"Updating list, display_list: {display_list[:5]}...\n")
+        self["bouquet_list"].setList(display_list)
+        self["bouquet_list"].moveToIndex(self.current_index)
+
+    def bouquet_label(self, bouquet):
+        bouquet_file = self.bouquet_names.get(bouquet)
+        summary = self.bouquet_tree.summary(bouquet_file) if bouquet_file else None
+        if summary is None:
+            return bouquet
+        count = self.bouquet_tree.channel_count(bouquet_file)
+        if summary.children:
+            return f"{bouquet} ({count}, {len(summary.children)} sub-bouquets)"
+        return f"{bouquet} ({count})"
+
+    def navigate_or_move_up(self):
+        if self.move_mode and self.selected_bouquets:
+            new_list = self.bouquet_list[:]
+            moved = False
+            selected_indices = [new_list.index(bouquet) for bouquet in self.selected_bouquets if bouquet in new_list]
+            if not selected_indices:
+                return
+            min_idx = min(selected_indices)
+            if min_idx == 0:
+                return
+            selected_group = [new_list[i] for i in sorted(selected_indices)]
+            for idx in sorted(selected_indices, reverse=True):
+                new_list.pop(idx)
+            insert_idx = min_idx - 1
+            for bouquet in selected_group:
+                new_list.insert(insert_idx, bouquet)
+                insert_idx += 1
+                moved = True
+            if self.current_index in selected_indices:
+                self.current_index -= 1
+            elif self.current_index > min_idx:
+                self.current_index -= len(selected_indices)
+            if moved:
+                self.bouquet_list = new_list
+                self.update_list()
+        else:
+            if self.current_index > 0:
+                self.current_index -= 1
+                self["bouquet_list"].moveToIndex(self.current_index)
+
+    def navigate_or_move_down(self):
+        if self.move_mode and self.selected_bouquets:
+            new_list = self.bouquet_list[:]
+            moved = False
+            selected_indices = [new_list.index(bouquet) for bouquet in self.selected_bouquets if bouquet in new_list]
+            if not selected_indices:
+                return
+            max_idx = max(selected_indices)
+            if max_idx == len(new_list) - 1:
+                return
+            selected_group = [new_list[i] for i in sorted(selected_indices)]
+            for idx in sorted(selected_indices, reverse=True):
+                new_list.pop(idx)
+            insert_idx = max_idx + 1 - len(selected_indices) + 1
+            for bouquet in selected_group:
+                new_list.insert(insert_idx, bouquet)
+                insert_idx += 1
+                moved = True
+            if self.current_index in selected_indices:
+                self.current_index += 1
+            elif self.current_index >= max_idx - len(selected_indices) + 1:
+                self.current_index += len(selected_indices)
+            if moved:
+                self.bouquet_list = new_list
+                self.update_list()
+        else:
+            if self.current_index < len(self.bouquet_list) - 1:
+                self.current_index += 1
+                self["bouquet_list"].moveToIndex(self.current_index)
+
+    def save_settings(self):
+        if not self.bouquet_list:
+            self["status"].setText("No bouquets to save!")
+            return
+        debug_file = "/tmp/channel_editor_debug.log"
+        try:
+            lines = self.changeset.read_lines("bouquets.tv") or []
+            new_lines = []
+            bouquet_lines = []
+            for line in lines:
+                if "FROM BOUQUET" in line:
+                    bouquet_lines.append(line)
+                else:
+                    new_lines.append(line)
+            for bouquet_name in self.bouquet_list:
+                bouquet_file = self.bouquet_names.get(bouquet_name)
+                if bouquet_file:
+                    for line in bouquet_lines:
+                        if bouquet_file in line:
+                            new_lines.append(line)
+                            break
+            self.changeset.stage_write("bouquets.tv", new_lines)
+            changed = self.changeset.external_changes()
+            if changed:
+                self.session.openWithCallback(
+                    self.overwrite_confirmed,
+                    MessageBox,
+                    f"Modified by another program since they were loaded: {', '.join(changed)}. Overwrite?",
+                    MessageBox.TYPE_YESNO
+                )
+                return
+            self.commit_changes()
+        except Exception as e:
+            self["status"].setText(f"Error saving settings: {str(e)}")
+            with open(debug_file, 'a') as df:
+                df.write(f"Error saving settings: {str(e)}\n")
+
+    def overwrite_confirmed(self, result):
+        if result:
+            try:
+                self.commit_changes()
+            except Exception as e:
+                self["status"].setText(f"Error saving settings: {str(e)}")
+        else:
+            self["status"].setText("Save cancelled. Changes are still staged.")
+
+    def commit_changes(self):
+        take_snapshot("Bouquet editor save")
+        committed = self.changeset.commit()
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Saved bouquets to /etc/enigma2/bouquets.tv, committed {committed} files\n")
+        self.reload_settings()
+        self["status"].setText("Settings saved successfully!")
+
+    def reload_settings(self):
+        try:
+            eDVBDB.getInstance().reloadServicelist()
+            eDVBDB.getInstance().reloadBouquets()
+            self.session.open(
+                MessageBox,
+                "Settings saved and reloaded successfully!",
+                MessageBox.TYPE_INFO,
+                timeout=5
+            )
+        except Exception as e:
+            self.session.open(
+                MessageBox,
+                f"Reload failed: {str(e)}",
+                MessageBox.TYPE_ERROR,
+                timeout=5
+            )
+
+    def open_channel_editor(self):
+        index = self["bouquet_list"].getSelectedIndex()
+        current = self.bouquet_list[index] if index is not None and 0 <= index < len(self.bouquet_list) else None
+        if current:
+            bouquet_file = self.bouquet_names.get(current)
+            if bouquet_file:
+                self.bouquet_satellites.pop(bouquet_file, None)
+                self.session.openWithCallback(self.channel_editor_closed, CiefpChannelEditor, bouquet_file, self.changeset)
+            else:
+                self.session.open(
+                    MessageBox,
+                    "Error: Selected bouquet file not found.",
+                    MessageBox.TYPE_ERROR,
+                    timeout=5
+                )
+        else:
+            self.session.open(
+                MessageBox,
+                "Please select a bouquet first.",
+                MessageBox.TYPE_INFO,
+                timeout=5
+            )
+
+    def channel_editor_closed(self, *args):
+        self.bouquet_tree = BouquetTree(self.changeset)
+        self.update_list()
+        if self.changeset:
+            self["status"].setText(f"{len(self.changeset)} staged changes. Press Save to apply.")
+
+    def exit(self):
+        if self.changeset:
+            self.session.openWithCallback(
+                self.exit_confirmed,
+                MessageBox,
+                f"Discard {len(self.changeset)} staged changes?",
+                MessageBox.TYPE_YESNO
+            )
+            return
+        self.close()
+
+    def exit_confirmed(self, result):
+        if result:
+            self.changeset.discard()
+            self.close()
@@ -0,0 +1,64 @@
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .snapshots import take_snapshot
+
+INSTALL_WORKERS = 4
+
+def plan_copies(file_names, source_dir, target_dir):
+    copies = []
+    for file_name in file_names:
+        source_path = os.path.join(source_dir, file_name)
+        if os.path.exists(source_path):
+            copies.append((source_path, os.path.join(target_dir, file_name)))
+    return copies
+
+class CopyJob:
+    def __init__(self, copies, snapshot_reason=None, on_installed=None, workers=INSTALL_WORKERS):
+        self.copies = list(copies)
+        self.snapshot_reason = snapshot_reason
+        self.on_installed = on_installed
+        self.workers = workers
+        self.done = 0
+        self.error = None
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def __len__(self):
+        return len(self.copies)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def copy(self, item):
+        source_path, destination_path = item
+        shutil.copyfile(source_path, destination_path + ".tmp")
+        with self.lock:
+            self.done += 1
+
+    def run(self):
+        try:
+            if self.snapshot_reason:
+                take_snapshot(self.snapshot_reason)
+            for target_dir in set(os.path.dirname(destination) for source, destination in self.copies):
+                os.makedirs(target_dir, exist_ok=True)
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(self.copy, self.copies))
+            for source_path, destination_path in self.copies:
+                os.replace(destination_path + ".tmp", destination_path)
+            os.sync()
+            if self.on_installed:
+                self.on_installed(destination for source, destination in self.copies)
+        except Exception as e:
+            self.error = e
+            for source_path, destination_path in self.copies:
+                if os.path.exists(destination_path + ".tmp"):
+                    os.remove(destination_path + ".tmp")
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Copy job finished: {self.done}/{len(self.copies)} files, error: {self.error}\n")
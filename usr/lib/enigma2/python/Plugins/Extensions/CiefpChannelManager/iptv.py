@@ -0,0 +1,78 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+import requests
+from .network import get_http_session
+
+IPTV_WORKERS = 8
+IPTV_TIMEOUT = (3, 5)
+IPTV_PROBE_BYTES = 1024
+
+STATUS_ALIVE = "alive"
+STATUS_DEAD = "dead"
+STATUS_SKIPPED = "skipped"
+
+def iptv_url_from_ref(ref):
+    parts = ref.replace("#SERVICE", "", 1).strip().split(":")
+    if len(parts) > 10 and parts[10]:
+        return unquote(parts[10])
+    return None
+
+def probe_stream(url, timeout=IPTV_TIMEOUT):
+    if not url or not url.lower().startswith(("http://", "https://")):
+        return STATUS_SKIPPED
+    session = get_http_session()
+    try:
+        response = session.head(url, timeout=timeout, allow_redirects=True)
+        response.close()
+        if response.status_code < 400 or response.status_code == 429:
+            return STATUS_ALIVE
+        if response.status_code not in (403, 405, 501):
+            return STATUS_DEAD
+        response = session.get(url, timeout=timeout, stream=True,
+                               headers={"Range": f"bytes=0-{IPTV_PROBE_BYTES - 1}"})
+        try:
+            if response.status_code >= 400:
+                return STATUS_DEAD
+            next(response.iter_content(IPTV_PROBE_BYTES), b"")
+            return STATUS_ALIVE
+        finally:
+            response.close()
+    except (requests.RequestException, OSError):
+        return STATUS_DEAD
+
+class IptvChecker:
+    def __init__(self, streams, workers=IPTV_WORKERS, timeout=IPTV_TIMEOUT):
+        self.streams = list(streams)
+        self.workers = workers
+        self.timeout = timeout
+        self.results = queue.Queue()
+        self.cancelled = threading.Event()
+        self.executor = None
+
+    def start(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        for key, url in self.streams:
+            self.executor.submit(self.check, key, url)
+        self.executor.shutdown(wait=False)
+
+    def check(self, key, url):
+        if self.cancelled.is_set():
+            return
+        try:
+            status = probe_stream(url, self.timeout)
+        except Exception:
+            status = STATUS_DEAD
+        self.results.put((key, status))
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def get_results(self):
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
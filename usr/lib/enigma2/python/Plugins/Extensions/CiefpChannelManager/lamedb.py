@@ -0,0 +1,111 @@
+from .watcher import file_version
+
+ORBPOS_TERRESTRIAL = 0xEEEE
+ORBPOS_CABLE = 0xFFFF
+
+_lamedb_cache = {}
+
+class LamedbIndex:
+    def __init__(self):
+        self.names = {}
+        self.transponders = {}
+
+    def orbital_position(self, key):
+        if not key:
+            return None
+        sid, namespace, tsid, onid = key
+        orbpos = self.transponders.get((namespace, tsid, onid))
+        if orbpos is None:
+            orbpos = namespace >> 16
+            if orbpos not in (ORBPOS_TERRESTRIAL, ORBPOS_CABLE) and orbpos > 3600:
+                return None
+        return orbpos
+
+def service_key_from_ref(ref):
+    parts = ref.replace("#SERVICE", "", 1).strip().split(":")
+    if len(parts) < 10:
+        return None
+    try:
+        return (int(parts[3], 16), int(parts[6], 16), int(parts[4], 16), int(parts[5], 16))
+    except ValueError:
+        return None
+
+def format_orbital_position(orbpos):
+    if orbpos == ORBPOS_TERRESTRIAL:
+        return "DVB-T"
+    if orbpos == ORBPOS_CABLE:
+        return "DVB-C"
+    if orbpos is None:
+        return "Unknown"
+    if orbpos > 1800:
+        return f"{(3600 - orbpos) / 10.0:.1f}W"
+    return f"{orbpos / 10.0:.1f}E"
+
+def parse_transponder_orbpos(line):
+    kind, _, data = line.partition(" ")
+    if kind == "t":
+        return ORBPOS_TERRESTRIAL
+    if kind == "c":
+        return ORBPOS_CABLE
+    if kind == "s":
+        fields = data.split(":")
+        if len(fields) > 4:
+            try:
+                orbpos = int(fields[4])
+            except ValueError:
+                return None
+            return orbpos + 3600 if orbpos < 0 else orbpos
+    return None
+
+def load_lamedb(lamedb_path):
+    stamp = file_version(lamedb_path)
+    if stamp is None:
+        return LamedbIndex()
+    cached = _lamedb_cache.get(lamedb_path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    index = LamedbIndex()
+    names = index.names
+    transponders = index.transponders
+    with open(lamedb_path, 'r', encoding='utf-8', errors='ignore') as f:
+        section = None
+        current_key = None
+        for line in f:
+            line = line.strip()
+            if section is None:
+                if line in ("transponders", "services"):
+                    section = line
+                continue
+            if line == "end":
+                section = None
+                current_key = None
+                continue
+            if section == "transponders":
+                if line == "/":
+                    current_key = None
+                elif current_key is None:
+                    parts = line.split(":")
+                    if len(parts) >= 3:
+                        try:
+                            current_key = (int(parts[0], 16), int(parts[1], 16), int(parts[2], 16))
+                        except ValueError:
+                            current_key = None
+                else:
+                    orbpos = parse_transponder_orbpos(line)
+                    if orbpos is not None:
+                        transponders[current_key] = orbpos
+            elif current_key is not None:
+                names[current_key] = line
+                current_key = None
+            elif not line.startswith("p:"):
+                parts = line.split(":")
+                if len(parts) >= 4:
+                    try:
+                        current_key = (int(parts[0], 16), int(parts[1], 16), int(parts[2], 16), int(parts[3], 16))
+                    except ValueError:
+                        current_key = None
+    _lamedb_cache[lamedb_path] = (stamp, index)
+    return index
+
+def load_lamedb_names(lamedb_path):
+    return load_lamedb(lamedb_path).names
@@ -0,0 +1,920 @@
+import os
+import time
+from enigma import eTimer
+from Components.Pixmap import Pixmap
+from Components.ActionMap import ActionMap
+from Components.ConfigList import ConfigListScreen
+from Components.config import config, configfile, getConfigListEntry
+from Components.Label import Label
+from Components.MenuList import MenuList
+from Screens.ChoiceBox import ChoiceBox
+from Screens.MessageBox import MessageBox
+from Screens.Screen import Screen
+from Tools.Directories import fileExists
+from enigma import eDVBDB
+from collections import Counter
+from .bouquetdiff import BouquetDiff, read_upstream_base, record_upstream_base, record_upstream_bases
+from .bouquets import bouquet_satellite_counts, referenced_bouquet_files, write_lines_atomic
+from .common import INSTALL_POLL_INTERVAL, INSTALLER_URL, PLUGIN_VERSION, PREVIEW_PAGE_SIZE, TMP_DOWNLOAD, TMP_SELECTED
+from .delta import UpdateJob, open_settings_zip
+from .install import CopyJob, plan_copies
+from .lamedb import format_orbital_position, load_lamedb, load_lamedb_names, service_key_from_ref
+from .network import clear_listing_cache, fetch_listing, fetch_plugin_version, get_source_name, update_mirror_server
+from .packages import find_package_archives, get_package_names, load_cache_stamp, load_package_index, refresh_settings_cache
+from .prefetch import update_prefetch
+from .resolver import get_name_resolver
+from .snapshots import get_snapshot_store, take_snapshot
+
+_preview_name_cache = {}
+
+class CiefpBouquetPreview(Screen):
+    skin = """
+        <screen position="center,center" size="1200,800" title="..:: Ciefp Bouquet Preview ::..">
+            <widget name="channel_list" position="0,0" size="700,700" scrollbarMode="showOnDemand" itemHeight="33" font="Regular;28" />
+            <widget name="background" pixmap="/usr/lib/enigma2/python/Plugins/Extensions/CiefpChannelManager/background3.png" position="700,0" size="500,800" />
+            <widget name="status" position="0,710" size="700,50" font="Regular;24" />
+            <widget name="red_button" position="0,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#9F1313" foregroundColor="#000000" />
+        </screen>
+    """
+
+    def __init__(self, session, bouquet_dir, bouquet_file):
+        Screen.__init__(self, session)
+        self.session = session
+        self.bouquet_path = os.path.join(bouquet_dir, bouquet_file)
+        self.lamedb_path = os.path.join(bouquet_dir, "lamedb")
+        self.entries = []
+        self.resolved = []
+        self.lamedb_services = {}
+        self["channel_list"] = MenuList([])
+        self["background"] = Pixmap()
+        self["status"] = Label("Loading preview...")
+        self["red_button"] = Label("Back")
+        self["actions"] = ActionMap(["OkCancelActions", "ColorActions", "DirectionActions"], {
+            "ok": self.exit,
+            "cancel": self.exit,
+            "red": self.exit,
+            "up": self.up,
+            "down": self.down,
+            "left": self.page_up,
+            "right": self.page_down,
+        }, -1)
+        self.load_timer = eTimer()
+        self.load_timer.callback.append(self.load_preview)
+        self.onLayoutFinish.append(self.start_loading)
+
+    def start_loading(self):
+        self.load_timer.start(0, True)
+
+    def load_preview(self):
+        debug_file = "/tmp/channel_editor_debug.log"
+        try:
+            st = os.stat(self.bouquet_path)
+            cache_key = (self.bouquet_path, st.st_mtime, st.st_size)
+            self.resolved = _preview_name_cache.setdefault(cache_key, [])
+            with open(self.bouquet_path, 'r', encoding='utf-8', errors='ignore') as f:
+                lines = [line.strip() for line in f if line.strip()]
+        except Exception as e:
+            self["status"].setText(f"Error loading preview: {str(e)}")
+            with open(debug_file, 'a') as df:
+                df.write(f"Error loading preview {self.bouquet_path}: {str(e)}\n")
+            return
+
+        self.entries = []
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            description = None
+            if i + 1 < len(lines) and lines[i + 1].startswith("#DESCRIPTION"):
+                description = lines[i + 1].replace("#DESCRIPTION", "", 1).strip()
+            if line.startswith("#SERVICE"):
+                parts = line.split(":")
+                if len(parts) > 1 and parts[1] == "64":
+                    self.entries.append(("marker", description or ""))
+                elif line.startswith("#SERVICE 4097") or line.startswith("#SERVICE 5002"):
+                    self.entries.append(("name", description or "Unknown IPTV"))
+                elif description:
+                    self.entries.append(("name", description))
+                else:
+                    self.entries.append(("service", line))
+                i += 2 if description is not None else 1
+            elif line.startswith("#DESCRIPTION"):
+                self.entries.append(("marker", line.replace("#DESCRIPTION", "", 1).strip()))
+                i += 1
+            else:
+                i += 1
+
+        if not self.entries:
+            self["status"].setText("No channels or markers found in bouquet!")
+            return
+        self.load_page()
+
+    def resolve_entry(self, entry):
+        kind, value = entry
+        if kind == "marker":
+            return f"--- {value} ---"
+        if kind == "name":
+            return value
+        if not self.lamedb_services:
+            self.lamedb_services = load_lamedb_names(self.lamedb_path)
+        key = service_key_from_ref(value)
+        name = self.lamedb_services.get(key) if key else None
+        if not name:
+            name = f"Unknown ({':'.join(f'{k:x}' for k in key)})" if key else "Unknown"
+        return name
+
+    def load_page(self):
+        loaded = len(self.resolved)
+        wanted = min(len(self.entries), max(loaded, self["channel_list"].getSelectedIndex() + 1) + PREVIEW_PAGE_SIZE)
+        if wanted > loaded:
+            self.resolved.extend(self.resolve_entry(entry) for entry in self.entries[loaded:wanted])
+            index = self["channel_list"].getSelectedIndex()
+            self["channel_list"].setList(self.resolved[:])
+            self["channel_list"].moveToIndex(index)
+        elif not self["channel_list"].list:
+            self["channel_list"].setList(self.resolved[:])
+        self["status"].setText(f"Showing {len(self.resolved)} of {len(self.entries)} entries.")
+
+    def up(self):
+        self["channel_list"].up()
+
+    def down(self):
+        if self["channel_list"].getSelectedIndex() >= len(self.resolved) - PREVIEW_PAGE_SIZE // 2:
+            self.load_page()
+        self["channel_list"].down()
+
+    def page_up(self):
+        self["channel_list"].pageUp()
+
+    def page_down(self):
+        self.load_page()
+        self["channel_list"].pageDown()
+
+    def exit(self):
+        self.close()
+
+class CiefpChannelManager(Screen):
+    skin = """
+        <screen position="center,center" size="1600,800" title="..:: Ciefp Bouquet Updater ::..    (Version {version})">
+            <widget name="left_list" position="0,0" size="620,700" scrollbarMode="showOnDemand" itemHeight="33" font="Regular;28" />
+            <widget name="right_list" position="630,0" size="610,700" scrollbarMode="showOnDemand" itemHeight="33" font="Regular;28" />
+            <widget name="background" pixmap="/usr/lib/enigma2/python/Plugins/Extensions/CiefpChannelManager/background.png" position="1240,0" size="360,800" />
+            <widget name="status" position="0,710" size="840,50" font="Regular;24" />
+            <widget name="red_button" position="0,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#9F1313" foregroundColor="#000000" />
+            <widget name="green_button" position="170,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#1F771F" foregroundColor="#000000" />
+            <widget name="yellow_button" position="340,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#9F9F13" foregroundColor="#000000" />
+            <widget name="blue_button" position="510,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#1F1F77" foregroundColor="#000000" />
+            <widget name="version_info" position="680,750" size="560,40" font="Regular;20" foregroundColor="#FFFFFF" />
+        </screen>
+    """.format(version=PLUGIN_VERSION)
+
+    def __init__(self, session):
+        Screen.__init__(self, session)
+        self.session = session
+        self.selected_bouquets = []
+        self.bouquet_names = {}
+        self.bouquet_files = {}
+        self.all_bouquets = []
+        self.bouquet_satellites = {}
+        self.satellite_filter = None
+        self.latest_version = None
+        self.copy_job = None
+        self.copy_action = None
+        self.copy_timer = eTimer()
+        self.copy_timer.callback.append(self.poll_copy_job)
+        self.update_job = None
+        self.update_plan = None
+        self.update_skipped = 0
+        self.update_timer = eTimer()
+        self.update_timer.callback.append(self.poll_update_job)
+        self["left_list"] = MenuList([])
+        self["right_list"] = MenuList([])
+        self["background"] = Pixmap()
+        self["status"] = Label("Loading bouquets...")
+        self["red_button"] = Label("Exit")
+        self["green_button"] = Label("Copy")
+        self["yellow_button"] = Label("Install")
+        self["blue_button"] = Label("Editor")
+        self["version_info"] = Label("")
+        self["actions"] = ActionMap(["OkCancelActions", "ColorActions", "MenuActions"], {
+            "ok": self.select_item,
+            "cancel": self.exit,
+            "up": self.up,
+            "down": self.down,
+            "red": self.exit,
+            "green": self.copy_files,
+            "yellow": self.install,
+            "blue": self.open_bouquet_editor,
+            "menu": self.show_menu,
+        }, -1)
+        self.onLayoutFinish.append(self.check_plugin_version)
+        self.onLayoutFinish.append(self.fetch_list_version_info)
+        self.cache_stamp = load_cache_stamp() if config.plugins.CiefpChannelManager.prefetch.value != "off" else None
+        if self.cache_stamp:
+            self.parse_satellites()
+        else:
+            self.download_settings()
+        self.load_bouquets()
+        if self.cache_stamp:
+            self["status"].setText(f"Using settings prefetched at {time.strftime('%Y-%m-%d %H:%M', time.localtime(self.cache_stamp['time']))}.")
+
+    def check_plugin_version(self):
+        debug_file = "/tmp/channel_editor_debug.log"
+        self.latest_version = self.cache_stamp.get("plugin_version") if self.cache_stamp else fetch_plugin_version()
+        with open(debug_file, 'a') as df:
+            df.write(f"Plugin version check: Current={PLUGIN_VERSION}, Latest={self.latest_version}\n")
+        if self.latest_version and self.latest_version != PLUGIN_VERSION:
+            self.setTitle(f"..:: Ciefp Bouquet Updater ::.. (Version {PLUGIN_VERSION}) (Update available: {self.latest_version})")
+            # Odlaganje prikaza MessageBox-a
+            self.upgrade_timer = eTimer()
+            self.upgrade_timer.callback.append(self.show_upgrade_prompt)
+            self.upgrade_timer.start(1000, True)  # 1 sekunda odlaganja
+        else:
+            self.setTitle(f"..:: Ciefp Bouquet Updater ::.. (Version {PLUGIN_VERSION})")
+
+    def show_upgrade_prompt(self):
+        debug_file = "/tmp/channel_editor_debug.log"
+        with open(debug_file, 'a') as df:
+            df.write(f"Showing upgrade prompt for version: {self.latest_version}\n")
+        if self.latest_version and self.latest_version != PLUGIN_VERSION:
+            self.session.openWithCallback(
+                self.confirm_upgrade,
+                MessageBox,
+                f"A new version ({self.latest_version}) is available. Would you like to upgrade the plugin now?",
+                MessageBox.TYPE_YESNO
+            )
+
+    def confirm_upgrade(self, result):
+        if result:
+            self.upgrade_plugin()
+
+    def upgrade_plugin(self):
+        debug_file = "/tmp/channel_editor_debug.log"
+        try:
+            cmd = f"wget -q --no-check-certificate {INSTALLER_URL} -O - | /bin/sh"
+            result = os.system(cmd)
+            with open(debug_file, 'a') as df:
+                df.write(f"Plugin upgrade executed: Command={cmd}, Result={result}\n")
+            if result == 0:
+                self.session.open(
+                    MessageBox,
+                    "Plugin upgrade completed successfully. Please restart the plugin or Enigma2 to apply changes.",
+                    MessageBox.TYPE_INFO,
+                    timeout=10
+                )
+            else:
+                self.session.open(
+                    MessageBox,
+                    f"Plugin upgrade failed with error code: {result}. Check logs for details.",
+                    MessageBox.TYPE_ERROR,
+                    timeout=10
+                )
+        except Exception as e:
+            with open(debug_file, 'a') as df:
+                df.write(f"Error during plugin upgrade: {str(e)}\n")
+            self.session.open(
+                MessageBox,
+                f"Error during plugin upgrade: {str(e)}",
+                MessageBox.TYPE_ERROR,
+                timeout=10
+            )
+
+    def fetch_list_version_info(self):
+        debug_file = "/tmp/channel_editor_debug.log"
+        if self.cache_stamp:
+            self["version_info"].setText(f"List: {', '.join(name.replace('.zip', '') for name in self.cache_stamp['archives'].values())}")
+            return
+        try:
+            archives = find_package_archives(fetch_listing(), get_package_names())
+            if archives:
+                version_with_date = ", ".join(file["name"].replace(".zip", "") for file in archives.values())
+                self["version_info"].setText(f"List: {version_with_date}")
+                with open(debug_file, 'a') as df:
+                    df.write(f"List version fetched: {version_with_date}\n")
+                return
+            self["version_info"].setText("List: (Date not available)")
+        except Exception as e:
+            with open(debug_file, 'a') as df:
+                df.write(f"Error fetching list version: {str(e)}\n")
+            self["version_info"].setText("List: (Error fetching date)")
+
+    def open_bouquet_editor(self):
+        from .editor import CiefpBouquetEditor
+        self.session.open(CiefpBouquetEditor)
+
+    def show_menu(self):
+        menu = [
+            ("Preview bouquet", "preview"),
+            ("Compare with installed bouquet", "diff"),
+            ("Filter by satellite", "satellite"),
+            ("Update installed bouquets", "update"),
+            ("Restore backup", "restore"),
+            ("Settings", "settings"),
+        ]
+        self.session.openWithCallback(self.menu_callback, ChoiceBox, title="CiefpChannelManager", list=menu)
+
+    def menu_callback(self, choice):
+        if not choice:
+            return
+        if choice[1] == "preview":
+            self.preview_bouquet()
+        elif choice[1] == "diff":
+            self.compare_bouquet()
+        elif choice[1] == "satellite":
+            self.choose_satellite_filter()
+        elif choice[1] == "update":
+            self.update_installed()
+        elif choice[1] == "restore":
+            self.session.open(CiefpSnapshotRestore)
+        elif choice[1] == "settings":
+            self.session.openWithCallback(self.settings_closed, CiefpSettings)
+
+    def settings_closed(self, saved=False):
+        if saved:
+            clear_listing_cache()
+            update_mirror_server()
+            update_prefetch(self.session)
+            self.cache_stamp = None
+            self.download_settings()
+            self.load_bouquets()
+            self.fetch_list_version_info()
+
+    def preview_bouquet(self):
+        selected_name = self["left_list"].getCurrent()
+        if not selected_name:
+            self["status"].setText("Please select a bouquet first.")
+            return
+        bouquet_file = self.bouquet_files.get(selected_name)
+        if not bouquet_file:
+            self["status"].setText(f"Bouquet file for {selected_name} not found!")
+            return
+        self.session.open(CiefpBouquetPreview, TMP_DOWNLOAD, bouquet_file)
+
+    def compare_bouquet(self):
+        selected_name = self["left_list"].getCurrent()
+        bouquet_file = self.bouquet_files.get(selected_name) if selected_name else None
+        if not bouquet_file:
+            self["status"].setText("Please select a bouquet first.")
+            return
+        if not os.path.exists(os.path.join("/etc/enigma2", bouquet_file)):
+            self["status"].setText(f"{selected_name} is not installed, nothing to compare.")
+            return
+        self.session.open(CiefpBouquetDiff, bouquet_file)
+
+    def download_settings(self):
+        source_name = get_source_name()
+        self["status"].setText(f"Downloading settings from {source_name}...")
+        try:
+            archives, missing = refresh_settings_cache()
+            if missing:
+                self["status"].setText(f"Packages not found on {source_name}: {', '.join(missing)}")
+            else:
+                self["status"].setText("Settings downloaded and extracted successfully.")
+            self.parse_satellites()
+        except Exception as e:
+            self["status"].setText(f"Error: {str(e)}")
+
+    def update_installed(self):
+        if self.is_busy():
+            return
+        self["status"].setText(f"Checking installed bouquets against {get_source_name()}...")
+        self.update_job = UpdateJob(self.load_update_archives)
+        self.update_job.start_plan()
+        self.update_timer.start(INSTALL_POLL_INTERVAL, False)
+
+    def load_update_archives(self):
+        archives = find_package_archives(fetch_listing(), get_package_names())
+        if not archives:
+            raise Exception(f"No matching ZIP file found on {get_source_name()}.")
+        return [open_settings_zip(file["download_url"]) for file in archives.values()]
+
+    def poll_update_job(self):
+        job = self.update_job
+        if job.is_running():
+            return
+        self.update_timer.stop()
+        if job.error:
+            if self.update_plan is None:
+                self["status"].setText(f"Error: {str(job.error)}")
+            else:
+                self.session.open(MessageBox, f"Update failed: {str(job.error)}", MessageBox.TYPE_ERROR)
+            self.update_plan = None
+            return
+        if self.update_plan is None:
+            self.update_planned(job.plan)
+        else:
+            self.update_finished(job)
+
+    def update_planned(self, plan):
+        local = plan.modified + plan.untracked
+        if not plan.changed and not local:
+            self["status"].setText(f"Installed bouquets are up to date ({plan.unchanged()} files checked).")
+            return
+        self.update_plan = plan
+        names = ", ".join(os.path.basename(target) for archive, member, target in local[:5])
+        if len(local) > 5:
+            names += ", ..."
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Update plan: {len(plan.changed)} changed upstream, locally modified "
+                     f"{[os.path.basename(target) for archive, member, target in plan.modified]}, "
+                     f"without recorded base {[os.path.basename(target) for archive, member, target in plan.untracked]}\n")
+        title = f"{len(plan.changed)} installed files changed upstream."
+        if local:
+            title += f" {len(local)} locally modified or untracked files also differ ({names})."
+        menu = []
+        if plan.changed:
+            menu.append((f"Update {len(plan.changed)} files, keep local edits", "keep"))
+        if plan.mergeable():
+            menu.append((f"Update and merge upstream additions into {len(plan.mergeable())} edited bouquets", "merge"))
+        if local:
+            menu.append((f"Update all and overwrite {len(local)} locally modified files", "overwrite"))
+        menu.append(("Cancel", None))
+        self.session.openWithCallback(self.update_confirmed, ChoiceBox, title=title, list=menu)
+
+    def update_confirmed(self, choice):
+        plan = self.update_plan
+        if not choice or not choice[1] or plan is None:
+            self.update_plan = None
+            self["status"].setText("Update cancelled.")
+            return
+        local = plan.modified + plan.untracked
+        if choice[1] == "overwrite":
+            items, merge_items = plan.changed + local, []
+        elif choice[1] == "merge":
+            items, merge_items = plan.changed, plan.mergeable()
+        else:
+            items, merge_items = plan.changed, []
+        self.update_skipped = len(local) - len(merge_items) if choice[1] != "overwrite" else 0
+        self["status"].setText(f"Updating {len(items) + len(merge_items)} files...")
+        self.update_job.start_apply(items, merge_items, "Update installed bouquets")
+        self.update_timer.start(INSTALL_POLL_INTERVAL, False)
+
+    def update_finished(self, job):
+        self.update_plan = None
+        self.reload_settings()
+        message = f"Updated {len(job.applied)} files ({job.transferred // 1024} KB downloaded)"
+        if job.merged:
+            message += f", merged {len(job.merged)}"
+        if self.update_skipped:
+            message += f", left {self.update_skipped} locally modified files unchanged"
+        self["status"].setText(message + ".")
+
+    def parse_satellites(self):
+        self.bouquet_satellites = {}
+        lamedb_index = load_lamedb(os.path.join(TMP_DOWNLOAD, "lamedb"))
+        bouquets_file = os.path.join(TMP_DOWNLOAD, "bouquets.tv")
+        if not lamedb_index.names or not os.path.exists(bouquets_file):
+            return
+        with open(bouquets_file, 'r', encoding='utf-8', errors='ignore') as f:
+            bouquet_files = referenced_bouquet_files(f)
+        for bouquet_file in bouquet_files:
+            file_path = os.path.join(TMP_DOWNLOAD, bouquet_file)
+            if os.path.exists(file_path):
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    self.bouquet_satellites[bouquet_file] = bouquet_satellite_counts(f, lamedb_index)
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Satellite index built for {len(self.bouquet_satellites)} bouquets\n")
+
+    def choose_satellite_filter(self):
+        channel_counts = Counter()
+        bouquet_counts = Counter()
+        for counts in self.bouquet_satellites.values():
+            channel_counts.update(counts)
+            bouquet_counts.update(counts.keys())
+        if not channel_counts:
+            self["status"].setText("No satellite information available.")
+            return
+        menu = [("All satellites", None)]
+        for orbpos, count in sorted(channel_counts.items(), key=lambda item: -item[1]):
+            menu.append((f"{format_orbital_position(orbpos)}  ({bouquet_counts[orbpos]} bouquets, {count} channels)", orbpos))
+        self.session.openWithCallback(self.satellite_filter_chosen, ChoiceBox, title="Filter by satellite", list=menu)
+
+    def satellite_filter_chosen(self, choice):
+        if choice:
+            self.satellite_filter = choice[1]
+            self.apply_satellite_filter()
+
+    def apply_satellite_filter(self):
+        if self.satellite_filter is None:
+            self["left_list"].setList(self.all_bouquets)
+            return
+        filtered = [name for name in self.all_bouquets
+                    if self.satellite_filter in self.bouquet_satellites.get(self.bouquet_files.get(name), ())]
+        self["left_list"].setList(filtered)
+        self["status"].setText(f"{len(filtered)} bouquets with channels on {format_orbital_position(self.satellite_filter)}.")
+
+    def load_bouquets(self):
+        self.bouquet_names = {}
+        self.bouquet_files = {}
+        bouquet_dir = TMP_DOWNLOAD
+        bouquets_file = os.path.join(bouquet_dir, "bouquets.tv")
+
+        if not os.path.exists(bouquet_dir):
+            self["status"].setText("Error: Temporary directory not found!")
+            return
+
+        bouquet_order = []
+        if fileExists(bouquets_file):
+            with open(bouquets_file, 'r', encoding='utf-8') as file:
+                for line in file:
+                    if "FROM BOUQUET" in line:
+                        start = line.find('"') + 1
+                        end = line.find('"', start)
+                        if start != -1 and end != -1:
+                            bouquet_file = line[start:end]
+                            bouquet_order.append(bouquet_file)
+        else:
+            self["status"].setText("Error: bouquets.tv not found!")
+            return
+
+        bouquet_display_list = []
+        name_to_file = {}
+        package_index = load_package_index(bouquet_dir) if len(get_package_names()) > 1 else {}
+
+        for bouquet_file in bouquet_order:
+            file_path = os.path.join(bouquet_dir, bouquet_file)
+            if os.path.exists(file_path):
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        first_line = f.readline().strip()
+                        if first_line.startswith("#NAME"):
+                            display_name = first_line.replace("#NAME", "", 1).strip()
+                            if bouquet_file in package_index:
+                                display_name = f"{display_name}  [{', '.join(package_index[bouquet_file])}]"
+                            self.bouquet_names[first_line] = bouquet_file
+                            self.bouquet_files[display_name] = bouquet_file
+                            name_to_file[bouquet_file] = display_name
+                except Exception as e:
+                    self["status"].setText(f"Error reading {bouquet_file}: {str(e)}")
+                    return
+
+        for bouquet_file in bouquet_order:
+            if bouquet_file in name_to_file:
+                bouquet_display_list.append(name_to_file[bouquet_file])
+
+        if not bouquet_display_list:
+            self["status"].setText("No valid bouquet files found!")
+            return
+
+        self.all_bouquets = bouquet_display_list
+        self["status"].setText("Bouquets loaded successfully.")
+        self.apply_satellite_filter()
+
+    def select_item(self):
+        selected_name = self["left_list"].getCurrent()
+        if selected_name:
+            if selected_name in self.selected_bouquets:
+                self.selected_bouquets.remove(selected_name)
+            else:
+                self.selected_bouquets.append(selected_name)
+            self["right_list"].setList(self.selected_bouquets)
+
+    def copy_files(self):
+        if not self.selected_bouquets:
+            self["status"].setText("No bouquets selected!")
+            return
+        if self.is_busy():
+            return
+
+        target_dir = TMP_SELECTED
+        if not os.path.exists(target_dir):
+            try:
+                os.makedirs(target_dir)
+            except PermissionError:
+                self["status"].setText("Permission denied: Unable to create directory.")
+                return
+
+        bouquet_files = [self.bouquet_files[name] for name in self.selected_bouquets if self.bouquet_files.get(name)]
+        self.start_copy_job(CopyJob(plan_copies(bouquet_files, TMP_DOWNLOAD, target_dir)), "copy")
+
+    def is_busy(self):
+        if self.copy_job and self.copy_job.is_running():
+            self["status"].setText("Please wait, files are still being copied...")
+            return True
+        if self.update_plan is not None or (self.update_job and self.update_job.is_running()):
+            self["status"].setText("Please wait, an update is still running...")
+            return True
+        return False
+
+    def start_copy_job(self, job, action):
+        self.copy_job = job
+        self.copy_action = action
+        self.copy_job.start()
+        self["status"].setText(f"Copying {len(job)} files...")
+        self.copy_timer.start(INSTALL_POLL_INTERVAL, False)
+
+    def poll_copy_job(self):
+        job = self.copy_job
+        if job.is_running():
+            self["status"].setText(f"Copying files: {job.done}/{len(job)}")
+            return
+        self.copy_timer.stop()
+        if job.error:
+            if self.copy_action == "install":
+                self.session.open(MessageBox, f"Failed to install: {str(job.error)}", MessageBox.TYPE_ERROR)
+            else:
+                self["status"].setText(f"Error copying files: {str(job.error)}")
+            return
+        if self.copy_action == "install":
+            self.install_finished(job)
+        else:
+            self.copy_finished(job)
+
+    def copy_finished(self, job):
+        copied_files = [os.path.basename(destination) for source, destination in job.copies]
+        bouquets_tv_path = os.path.join('/etc/enigma2', 'bouquets.tv')
+        if os.path.exists(bouquets_tv_path):
+            with open(bouquets_tv_path, 'r') as f:
+                lines = f.readlines()
+
+            updated = False
+            for bouquet_file in copied_files:
+                if not any(bouquet_file in line for line in lines):
+                    tmp_bouquets_tv = os.path.join(TMP_DOWNLOAD, 'bouquets.tv')
+                    if os.path.exists(tmp_bouquets_tv):
+                        with open(tmp_bouquets_tv, 'r') as f:
+                            for line in f:
+                                if bouquet_file in line:
+                                    lines.append(line)
+                                    updated = True
+                                    break
+
+            if updated:
+                with open(bouquets_tv_path, 'w') as f:
+                    f.writelines(lines)
+
+        self["status"].setText("Files copied and bouquets.tv updated successfully!")
+
+    def install(self):
+        if not self.selected_bouquets:
+            self.session.open(MessageBox, "No bouquets selected!", MessageBox.TYPE_ERROR)
+            return
+
+        self.session.openWithCallback(
+            self.install_confirmed,
+            MessageBox,
+            "Install selected bouquets and common files?",
+            MessageBox.TYPE_YESNO
+        )
+
+    def install_confirmed(self, result):
+        if not result:
+            return
+        if self.is_busy():
+            return
+
+        enigma2_dir = "/etc/enigma2"
+        bouquet_files = [self.bouquet_files[name] for name in self.selected_bouquets if self.bouquet_files.get(name)]
+        copies = plan_copies(bouquet_files, TMP_SELECTED, enigma2_dir) + plan_copies(['lamedb'], TMP_DOWNLOAD, enigma2_dir)
+        self.start_copy_job(CopyJob(copies, snapshot_reason="Install", on_installed=record_upstream_bases), "install")
+
+    def install_finished(self, job):
+        if job.copies:
+            self.reload_settings()
+            self["status"].setText("Installation successful! Common files and bouquets are now active.")
+        else:
+            self["status"].setText("No files installed.")
+
+    def reload_settings(self):
+        try:
+            eDVBDB.getInstance().reloadServicelist()
+            eDVBDB.getInstance().reloadBouquets()
+            self.session.open(
+                MessageBox,
+                "Reload successful! New bouquets and common files are now active. .::ciefpsettings::.",
+                MessageBox.TYPE_INFO,
+                timeout=5
+            )
+        except Exception as e:
+            self.session.open(
+                MessageBox,
+                "Reload failed: " + str(e),
+                MessageBox.TYPE_ERROR,
+                timeout=5
+            )
+
+    def up(self):
+        self["left_list"].up()
+
+    def down(self):
+        self["left_list"].down()
+
+    def exit(self):
+        if self.is_busy():
+            return
+        self.close()
+
+class CiefpBouquetDiff(Screen):
+    skin = """
+        <screen position="center,center" size="1200,800" title="..:: Ciefp Bouquet Diff ::..">
+            <widget name="diff_list" position="0,0" size="700,700" scrollbarMode="showOnDemand" itemHeight="33" font="Regular;28" />
+            <widget name="background" pixmap="/usr/lib/enigma2/python/Plugins/Extensions/CiefpChannelManager/background3.png" position="700,0" size="500,800" />
+            <widget name="status" position="0,710" size="700,50" font="Regular;24" />
+            <widget name="red_button" position="0,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#9F1313" foregroundColor="#000000" />
+            <widget name="green_button" position="170,750" size="300,35" font="Bold;28" halign="center" backgroundColor="#1F771F" foregroundColor="#000000" />
+        </screen>
+    """
+
+    def __init__(self, session, bouquet_file):
+        Screen.__init__(self, session)
+        self.session = session
+        self.bouquet_file = bouquet_file
+        self.local_path = os.path.join("/etc/enigma2", bouquet_file)
+        self.remote_path = os.path.join(TMP_DOWNLOAD, bouquet_file)
+        self.diff = None
+        self["diff_list"] = MenuList([])
+        self["background"] = Pixmap()
+        self["status"] = Label("Comparing bouquets...")
+        self["red_button"] = Label("Back")
+        self["green_button"] = Label("Apply additions")
+        self["actions"] = ActionMap(["OkCancelActions", "ColorActions"], {
+            "ok": self.exit,
+            "cancel": self.exit,
+            "red": self.exit,
+            "green": self.apply_additions,
+        }, -1)
+        self.onLayoutFinish.append(self.load_diff)
+
+    def entry_name(self, entry, names):
+        if entry.description:
+            return entry.description
+        key = service_key_from_ref(entry.service_line or "")
+        if key and key in names:
+            return names[key]
+        return entry.service_line or "Unknown"
+
+    def load_diff(self):
+        try:
+            with open(self.local_path, 'r', encoding='utf-8', errors='ignore') as f:
+                local_lines = f.readlines()
+            with open(self.remote_path, 'r', encoding='utf-8', errors='ignore') as f:
+                remote_lines = f.readlines()
+            self.diff = BouquetDiff(local_lines, remote_lines, read_upstream_base(self.bouquet_file))
+            remote_names = load_lamedb_names(os.path.join(TMP_DOWNLOAD, "lamedb"))
+            local_names = get_name_resolver().resolve([entry.service_line for entry in self.diff.local if entry.service_line], self.bouquet_file)
+        except Exception as e:
+            self["status"].setText(f"Error comparing bouquets: {str(e)}")
+            with open("/tmp/channel_editor_debug.log", 'a') as df:
+                df.write(f"Error comparing {self.bouquet_file}: {str(e)}\n")
+            return
+        display = [f"+ {self.entry_name(entry, remote_names)}" for entry in self.diff.added]
+        display += [f"- {self.entry_name(entry, local_names)}" for entry in self.diff.removed]
+        display += [f"~ {self.entry_name(entry, remote_names)} (moved)" for entry in self.diff.moved]
+        display += [f"x {self.entry_name(entry, remote_names)} (deleted locally, kept)" for entry in self.diff.deleted_locally]
+        self["diff_list"].setList(display)
+        self["status"].setText(f"{len(self.diff.added)} added, {len(self.diff.removed)} removed, {len(self.diff.moved)} moved upstream.")
+
+    def apply_additions(self):
+        if not self.diff or not self.diff.added:
+            self["status"].setText("No additions to apply.")
+            return
+        message = f"Add {len(self.diff.added)} new channels to the installed bouquet, keeping your order and deletions?"
+        if not self.diff.has_base:
+            message += " No earlier upstream version is recorded, so channels you deleted will be added back."
+        self.session.openWithCallback(self.apply_confirmed, MessageBox, message, MessageBox.TYPE_YESNO)
+
+    def apply_confirmed(self, result):
+        if not result:
+            return
+        take_snapshot(f"Merge additions into {self.bouquet_file}")
+        try:
+            write_lines_atomic(self.local_path, self.diff.merged_lines())
+            record_upstream_base(self.bouquet_file, self.remote_path)
+            eDVBDB.getInstance().reloadServicelist()
+            eDVBDB.getInstance().reloadBouquets()
+        except Exception as e:
+            self.session.open(MessageBox, f"Merge failed: {str(e)}", MessageBox.TYPE_ERROR)
+            return
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Merged {len(self.diff.added)} additions into {self.bouquet_file}\n")
+        self.load_diff()
+
+    def exit(self):
+        self.close()
+
+class CiefpSnapshotRestore(Screen):
+    skin = """
+        <screen position="center,center" size="1200,800" title="..:: Ciefp Restore Backup ::..">
+            <widget name="snapshot_list" position="0,0" size="700,700" scrollbarMode="showOnDemand" itemHeight="33" font="Regular;28" />
+            <widget name="background" pixmap="/usr/lib/enigma2/python/Plugins/Extensions/CiefpChannelManager/background2.png" position="700,0" size="500,800" />
+            <widget name="status" position="0,710" size="700,50" font="Regular;24" />
+            <widget name="red_button" position="0,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#9F1313" foregroundColor="#000000" />
+            <widget name="green_button" position="170,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#1F771F" foregroundColor="#000000" />
+        </screen>
+    """
+
+    def __init__(self, session):
+        Screen.__init__(self, session)
+        self.session = session
+        self.store = get_snapshot_store()
+        self.snapshots = []
+        self["snapshot_list"] = MenuList([])
+        self["background"] = Pixmap()
+        self["status"] = Label("Select a backup to restore.")
+        self["red_button"] = Label("Exit")
+        self["green_button"] = Label("Restore")
+        self["actions"] = ActionMap(["OkCancelActions", "ColorActions"], {
+            "ok": self.restore,
+            "cancel": self.exit,
+            "red": self.exit,
+            "green": self.restore,
+        }, -2)
+        self.load_snapshots()
+
+    def load_snapshots(self):
+        try:
+            self.snapshots = self.store.list_snapshots()
+        except Exception as e:
+            self.snapshots = []
+            self["status"].setText(f"Error reading backups: {str(e)}")
+        display = []
+        for manifest in self.snapshots:
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(manifest["created"]))
+            display.append(f"{created}  {manifest['reason']} ({len(manifest['files'])} files)")
+        self["snapshot_list"].setList(display)
+        if not self.snapshots:
+            self["status"].setText("No backups found.")
+
+    def restore(self):
+        index = self["snapshot_list"].getSelectedIndex()
+        if not self.snapshots or index is None or index >= len(self.snapshots):
+            return
+        self.selected_snapshot = self.snapshots[index]
+        self.session.openWithCallback(
+            self.restore_confirmed,
+            MessageBox,
+            f"Restore backup {self.selected_snapshot['id']}? Current bouquets and lamedb will be replaced.",
+            MessageBox.TYPE_YESNO
+        )
+
+    def restore_confirmed(self, result):
+        if not result:
+            return
+        snapshot_id = self.selected_snapshot["id"]
+        try:
+            manifest = self.store.read_manifest(snapshot_id)
+            take_snapshot(f"Before restore of {snapshot_id}", protect=(snapshot_id,))
+            restored = self.store.restore(snapshot_id, manifest)
+            with open("/tmp/channel_editor_debug.log", 'a') as df:
+                df.write(f"Restored snapshot {snapshot_id}: {restored} files\n")
+            eDVBDB.getInstance().reloadServicelist()
+            eDVBDB.getInstance().reloadBouquets()
+            self.session.open(MessageBox, f"Backup {snapshot_id} restored and reloaded.", MessageBox.TYPE_INFO, timeout=5)
+        except Exception as e:
+            self.session.open(MessageBox, f"Restore failed: {str(e)}", MessageBox.TYPE_ERROR)
+        self.load_snapshots()
+
+    def exit(self):
+        self.close()
+
+class CiefpSettings(ConfigListScreen, Screen):
+    skin = """
+        <screen position="center,center" size="1200,800" title="..:: Ciefp Channel Manager Settings ::..">
+            <widget name="config" position="0,0" size="700,700" scrollbarMode="showOnDemand" itemHeight="33" font="Regular;28" />
+            <widget name="background" pixmap="/usr/lib/enigma2/python/Plugins/Extensions/CiefpChannelManager/background2.png" position="700,0" size="500,800" />
+            <widget name="status" position="0,710" size="700,50" font="Regular;24" />
+            <widget name="red_button" position="0,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#9F1313" foregroundColor="#000000" />
+            <widget name="green_button" position="170,750" size="150,35" font="Bold;28" halign="center" backgroundColor="#1F771F" foregroundColor="#000000" />
+        </screen>
+    """
+
+    def __init__(self, session):
+        Screen.__init__(self, session)
+        self.session = session
+        cfg = config.plugins.CiefpChannelManager
+        ConfigListScreen.__init__(self, [
+            getConfigListEntry("Settings source", cfg.source),
+            getConfigListEntry("LAN mirror URL", cfg.mirror_url),
+            getConfigListEntry("Local directory", cfg.local_path),
+            getConfigListEntry("Packages (comma separated)", cfg.packages),
+            getConfigListEntry("Run mirror server on this box", cfg.mirror_server),
+            getConfigListEntry("Mirror server port", cfg.mirror_port),
+            getConfigListEntry("Mirror cache directory", cfg.mirror_cache),
+            getConfigListEntry("Background prefetch", cfg.prefetch),
+            getConfigListEntry("Prefetch minutes after boot", cfg.prefetch_delay),
+            getConfigListEntry("Nightly prefetch hour", cfg.prefetch_hour),
+            getConfigListEntry("Auto-apply updates to installed bouquets", cfg.prefetch_apply),
+            getConfigListEntry("Backup before install/save", cfg.snapshots),
+            getConfigListEntry("Backup directory", cfg.snapshot_dir),
+            getConfigListEntry("Backups to keep", cfg.snapshot_keep),
+        ], session=session)
+        self["background"] = Pixmap()
+        self["status"] = Label("")
+        self["red_button"] = Label("Cancel")
+        self["green_button"] = Label("Save")
+        self["actions"] = ActionMap(["OkCancelActions", "ColorActions"], {
+            "ok": self.save,
+            "cancel": self.cancel,
+            "red": self.cancel,
+            "green": self.save,
+        }, -2)
+
+    def save(self):
+        for entry in self["config"].list:
+            entry[1].save()
+        configfile.save()
+        self.close(True)
+
+    def cancel(self):
+        for entry in self["config"].list:
+            entry[1].cancel()
+        self.close(False)
@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote
+from urllib.request import Request, urlopen
+
+DEFAULT_UPSTREAM = "https://api.github.com/repos/ciefp/ciefpsettings-enigma2-zipped/contents/"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_DIR = "/media/hdd/ciefp-mirror"
+LISTING_FILE = "listing.json"
+LISTING_MAX_AGE = 3600
+URL_TIMEOUT = 30
+COPY_CHUNK_SIZE = 65536
+
+def urllib_get_json(url):
+    request = Request(url, headers={"User-Agent": "CiefpChannelManager-mirror"})
+    with urlopen(request, timeout=URL_TIMEOUT) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+def urllib_download(url, destination):
+    request = Request(url, headers={"User-Agent": "CiefpChannelManager-mirror"})
+    with urlopen(request, timeout=URL_TIMEOUT) as response, open(destination, 'wb') as f:
+        shutil.copyfileobj(response, f, COPY_CHUNK_SIZE)
+
+class MirrorCache:
+    def __init__(self, cache_dir, upstream_url=DEFAULT_UPSTREAM, max_age=LISTING_MAX_AGE,
+                 prefetch=(), get_json=None, download=None):
+        self.cache_dir = cache_dir
+        self.upstream_url = upstream_url
+        self.max_age = max_age
+        self.prefetch = list(prefetch)
+        self.get_json = get_json or urllib_get_json
+        self.download = download or urllib_download
+        self.lock = threading.Lock()
+        self.entries = None
+        self.fetched_at = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def listing(self):
+        with self.lock:
+            if self.entries is None or time.time() - self.fetched_at > self.max_age:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    log(f"Upstream listing failed: {str(e)}")
+                    if self.entries is None:
+                        self.entries = self.load_cached_listing()
+            return self.entries
+
+    def load_cached_listing(self):
+        listing_path = os.path.join(self.cache_dir, LISTING_FILE)
+        if os.path.exists(listing_path):
+            with open(listing_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return [{"name": name, "download_url": None}
+                for name in sorted(os.listdir(self.cache_dir)) if name.endswith(".zip")]
+
+    def refresh(self):
+        files = self.get_json(self.upstream_url)
+        entries = [{"name": f["name"], "download_url": f["download_url"]}
+                   for f in files if f.get("name", "").endswith(".zip") and f.get("download_url")]
+        listing_path = os.path.join(self.cache_dir, LISTING_FILE)
+        with open(listing_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(listing_path + ".tmp", listing_path)
+        self.entries = entries
+        self.fetched_at = time.time()
+        names = set(entry["name"] for entry in entries)
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".zip") and name not in names:
+                os.remove(os.path.join(self.cache_dir, name))
+                log(f"Pruned {name}")
+        for entry in entries:
+            if any(pattern in entry["name"] for pattern in self.prefetch):
+                self.fetch_archive(entry)
+        log(f"Listing refreshed: {len(entries)} archives")
+
+    def fetch_archive(self, entry):
+        archive_path = os.path.join(self.cache_dir, entry["name"])
+        if not os.path.exists(archive_path):
+            if not entry.get("download_url"):
+                return None
+            self.download(entry["download_url"], archive_path + ".part")
+            os.replace(archive_path + ".part", archive_path)
+            log(f"Cached {entry['name']}")
+        return archive_path
+
+    def archive(self, name):
+        entries = self.listing()
+        entry = next((e for e in entries if e["name"] == name), None)
+        if entry is None:
+            return None
+        with self.lock:
+            return self.fetch_archive(entry)
+
+def parse_range(header, size):
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                return False
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+class MirrorRequestHandler(BaseHTTPRequestHandler):
+    cache = None
+
+    def log_message(self, format, *args):
+        log("%s %s" % (self.client_address[0], format % args))
+
+    def do_GET(self):
+        path = unquote(self.path.split("?", 1)[0])
+        try:
+            if path.rstrip("/") in ("", "/contents"):
+                self.send_listing()
+            elif path.startswith("/files/"):
+                self.send_archive(os.path.basename(path))
+            else:
+                self.send_error(404)
+        except Exception as e:
+            log(f"Error serving {path}: {str(e)}")
+            self.send_error(502, str(e))
+
+    def send_listing(self):
+        host = self.headers.get("Host") or "%s:%d" % self.server.server_address[:2]
+        entries = [{"name": entry["name"], "download_url": f"http://{host}/files/{quote(entry['name'])}"}
+                   for entry in self.cache.listing()]
+        body = json.dumps(entries).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_archive(self, name):
+        archive_path = self.cache.archive(name)
+        if not archive_path:
+            self.send_error(404)
+            return
+        with open(archive_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            byte_range = parse_range(self.headers.get("Range"), size)
+            if byte_range is False:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if byte_range:
+                start, end = byte_range
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                start, end = 0, size - 1
+                self.send_response(200)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(COPY_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+def start_server(cache, port=DEFAULT_PORT, host=""):
+    handler = type("BoundMirrorRequestHandler", (MirrorRequestHandler,), {"cache": cache})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="CiefpMirror")
+    thread.daemon = True
+    thread.start()
+    log(f"Mirror serving {cache.cache_dir} on port {server.server_address[1]}")
+    return server
+
+def log(message):
+    with open("/tmp/channel_editor_debug.log", 'a') as df:
+        df.write(f"Mirror: {message}\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the CiefpSettings listing and archives to a LAN of receivers.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM)
+    parser.add_argument("--max-age", type=int, default=LISTING_MAX_AGE, help="seconds before the upstream listing is refreshed")
+    parser.add_argument("--prefetch", action="append", default=[], help="archive name pattern to download on every refresh")
+    args = parser.parse_args(argv)
+    cache = MirrorCache(args.cache, args.upstream, args.max_age, args.prefetch)
+    server = start_server(cache, args.port)
+    print(f"Serving {args.cache} on port {server.server_address[1]}, Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
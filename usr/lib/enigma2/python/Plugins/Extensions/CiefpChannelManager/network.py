@@ -0,0 +1,139 @@
+import os
+import shutil
+import time
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from Components.config import config
+from .common import GITHUB_API_URL, PLUGIN_NAME, PLUGIN_VERSION, PLUGIN_VERSION_URL
+from .mirror import MirrorCache, start_server
+
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 30
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.5
+HTTP_MAX_RETRY_DELAY = 30
+HTTP_CHUNK_SIZE = 65536
+LISTING_MAX_AGE = 60
+
+_http_session = None
+_listing_cache = {}
+_mirror_server = None
+
+def get_http_session():
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = f"{PLUGIN_NAME}/{PLUGIN_VERSION}"
+        _http_session = session
+    return _http_session
+
+def get_retry_delay(response, attempt):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                delay = HTTP_BACKOFF * (2 ** attempt)
+        return max(0, min(delay, HTTP_MAX_RETRY_DELAY))
+    return min(HTTP_BACKOFF * (2 ** attempt), HTTP_MAX_RETRY_DELAY)
+
+def http_get(url, retries=HTTP_RETRIES, timeout=None, **kwargs):
+    session = get_http_session()
+    if timeout is None:
+        timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    attempt = 0
+    while True:
+        try:
+            response = session.get(url, timeout=timeout, **kwargs)
+        except requests.ConnectionError as e:
+            if attempt >= retries:
+                raise
+            response = None
+            with open("/tmp/channel_editor_debug.log", 'a') as df:
+                df.write(f"HTTP GET {url} failed ({str(e)}), retry {attempt + 1}/{retries}\n")
+        else:
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            if attempt >= retries:
+                return response
+            response.close()
+            with open("/tmp/channel_editor_debug.log", 'a') as df:
+                df.write(f"HTTP GET {url} returned {response.status_code}, retry {attempt + 1}/{retries}\n")
+        time.sleep(get_retry_delay(response, attempt))
+        attempt += 1
+
+def http_download(url, destination):
+    response = http_get(url, stream=True)
+    try:
+        response.raise_for_status()
+        with open(destination, 'wb') as f:
+            for chunk in response.iter_content(HTTP_CHUNK_SIZE):
+                f.write(chunk)
+    finally:
+        response.close()
+
+def fetch_json(url, max_age=LISTING_MAX_AGE):
+    cached = _listing_cache.get(url)
+    if cached and time.time() - cached[0] < max_age:
+        return cached[1]
+    response = http_get(url)
+    response.raise_for_status()
+    data = response.json()
+    _listing_cache[url] = (time.time(), data)
+    return data
+
+def clear_listing_cache():
+    _listing_cache.clear()
+
+def get_source_name():
+    return config.plugins.CiefpChannelManager.source.getText()
+
+def fetch_listing():
+    source = config.plugins.CiefpChannelManager.source.value
+    if source == "local":
+        local_path = config.plugins.CiefpChannelManager.local_path.value
+        return [{"name": name, "download_url": os.path.join(local_path, name)}
+                for name in sorted(os.listdir(local_path)) if name.endswith(".zip")]
+    if source == "mirror":
+        return fetch_json(config.plugins.CiefpChannelManager.mirror_url.value.rstrip("/") + "/contents/")
+    return fetch_json(GITHUB_API_URL)
+
+def fetch_plugin_version():
+    try:
+        response = http_get(PLUGIN_VERSION_URL)
+        response.raise_for_status()
+        return response.text.strip()
+    except Exception as e:
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Error checking plugin version: {str(e)}\n")
+        return None
+
+def fetch_archive(download_url, destination):
+    if download_url.startswith("http://") or download_url.startswith("https://"):
+        http_download(download_url, destination)
+    else:
+        shutil.copyfile(download_url, destination)
+
+def update_mirror_server():
+    global _mirror_server
+    cfg = config.plugins.CiefpChannelManager
+    if _mirror_server is not None:
+        _mirror_server.shutdown()
+        _mirror_server.server_close()
+        _mirror_server = None
+    if cfg.mirror_server.value:
+        from .packages import get_package_names
+        try:
+            cache = MirrorCache(cfg.mirror_cache.value, GITHUB_API_URL, prefetch=get_package_names(),
+                                get_json=lambda url: fetch_json(url, max_age=0), download=http_download)
+            _mirror_server = start_server(cache, cfg.mirror_port.value)
+        except Exception as e:
+            with open("/tmp/channel_editor_debug.log", 'a') as df:
+                df.write(f"Error starting mirror server: {str(e)}\n")
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from Components.config import config
+from .archive import extract_settings_archive
+from .bouquets import referenced_bouquet_files
+from .common import STATIC_NAMES, TMP_DOWNLOAD, TMP_PACKAGES
+from .network import fetch_archive, fetch_listing, fetch_plugin_version
+
+PACKAGE_WORKERS = 4
+PACKAGE_INDEX = "packages.json"
+CACHE_STAMP = "cache.json"
+WARM_CACHE_MAX_AGE = 26 * 3600
+
+_refresh_lock = threading.Lock()
+
+def get_package_names():
+    names = [name.strip() for name in config.plugins.CiefpChannelManager.packages.value.split(",") if name.strip()]
+    return names or list(STATIC_NAMES)
+
+def find_package_archives(files, packages):
+    archives = {}
+    for package in packages:
+        for file in files:
+            if package in file["name"] and file["name"].endswith(".zip"):
+                archives[package] = file
+                break
+    return archives
+
+def download_package(package, file):
+    package_dir = os.path.join(TMP_PACKAGES, package)
+    temp_extract_path = package_dir + ".extract"
+    if os.path.exists(temp_extract_path):
+        shutil.rmtree(temp_extract_path)
+    fetch_archive(file["download_url"], package_dir + ".zip")
+    extract_settings_archive(package_dir + ".zip", package_dir, temp_extract_path)
+    shutil.rmtree(temp_extract_path, ignore_errors=True)
+    return package_dir
+
+def download_packages(archives, workers=PACKAGE_WORKERS):
+    os.makedirs(TMP_PACKAGES, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [(package, executor.submit(download_package, package, file)) for package, file in archives.items()]
+    return {package: future.result() for package, future in futures}
+
+def merge_lamedb(lamedb_paths, destination):
+    header = None
+    transponders = {}
+    services = {}
+    for lamedb_path in lamedb_paths:
+        with open(lamedb_path, 'r', encoding='utf-8', errors='ignore') as f:
+            section = None
+            block = []
+            for line in f:
+                line = line.rstrip("\r\n")
+                if header is None:
+                    header = line
+                    continue
+                if section is None:
+                    if line in ("transponders", "services"):
+                        section = line
+                        block = []
+                    continue
+                if line == "end":
+                    section = None
+                    continue
+                block.append(line)
+                if section == "transponders" and line == "/":
+                    transponders.setdefault(block[0], block)
+                    block = []
+                elif section == "services" and len(block) == 3:
+                    services.setdefault(block[0], block)
+                    block = []
+    with open(destination + ".tmp", 'w', encoding='utf-8') as f:
+        f.write((header or "eDVB services /4/") + "\n")
+        f.write("transponders\n")
+        for block in transponders.values():
+            f.write("\n".join(block) + "\n")
+        f.write("end\nservices\n")
+        for block in services.values():
+            f.write("\n".join(block) + "\n")
+        f.write("end\nHave a lot of bugs!\n")
+    os.replace(destination + ".tmp", destination)
+    return len(services)
+
+def merge_packages(package_dirs, destination=TMP_DOWNLOAD):
+    staging = destination + ".merge"
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    os.makedirs(staging)
+    header = []
+    entries = []
+    index = {}
+    digests = {}
+    lamedb_paths = []
+    for package, package_dir in package_dirs.items():
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", package)
+        bouquets_tv = os.path.join(package_dir, "bouquets.tv")
+        lines = []
+        if os.path.exists(bouquets_tv):
+            with open(bouquets_tv, 'r', encoding='utf-8', errors='ignore') as f:
+                lines = f.readlines()
+        if not header:
+            header = [line for line in lines if "FROM BOUQUET" not in line]
+        for line in lines:
+            bouquet_files = referenced_bouquet_files([line])
+            if not bouquet_files or not os.path.exists(os.path.join(package_dir, bouquet_files[0])):
+                continue
+            bouquet_file = bouquet_files[0]
+            with open(os.path.join(package_dir, bouquet_file), 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha1(data).hexdigest()
+            target = bouquet_file
+            if target in digests and digests[target] != digest:
+                stem, ext = os.path.splitext(bouquet_file)
+                target = f"{stem}_{slug}{ext}"
+                line = line.replace(f'"{bouquet_file}"', f'"{target}"')
+            if target in index:
+                if package not in index[target]:
+                    index[target].append(package)
+                continue
+            with open(os.path.join(staging, target), 'wb') as f:
+                f.write(data)
+            digests[target] = digest
+            index[target] = [package]
+            entries.append(line)
+        for name in os.listdir(package_dir):
+            source_path = os.path.join(package_dir, name)
+            if name == "lamedb":
+                lamedb_paths.append(source_path)
+            elif name != "bouquets.tv" and name not in digests and os.path.isfile(source_path) \
+                    and not os.path.exists(os.path.join(staging, name)):
+                shutil.copy(source_path, os.path.join(staging, name))
+    if lamedb_paths:
+        merge_lamedb(lamedb_paths, os.path.join(staging, "lamedb"))
+    with open(os.path.join(staging, "bouquets.tv"), 'w', encoding='utf-8') as f:
+        f.writelines(header + entries)
+    with open(os.path.join(staging, PACKAGE_INDEX), 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    if os.path.exists(destination):
+        shutil.rmtree(destination)
+    os.rename(staging, destination)
+    return index
+
+def load_package_index(bouquet_dir=TMP_DOWNLOAD):
+    try:
+        with open(os.path.join(bouquet_dir, PACKAGE_INDEX), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def package_archive_path(package):
+    return os.path.join(TMP_PACKAGES, package) + ".zip"
+
+def refresh_settings_cache():
+    if not _refresh_lock.acquire(False):
+        raise Exception("A background download is already running.")
+    try:
+        packages = get_package_names()
+        source = config.plugins.CiefpChannelManager.source.value
+        archives = find_package_archives(fetch_listing(), packages)
+        if not archives:
+            raise Exception(f"No matching ZIP file found on {config.plugins.CiefpChannelManager.source.getText()}.")
+        missing = [package for package in packages if package not in archives]
+        index = merge_packages(download_packages(archives))
+        with open(os.path.join(TMP_DOWNLOAD, CACHE_STAMP), 'w', encoding='utf-8') as f:
+            json.dump({
+                "time": time.time(),
+                "source": source,
+                "packages": packages,
+                "archives": {package: file["name"] for package, file in archives.items()},
+                "plugin_version": fetch_plugin_version(),
+            }, f)
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Merged packages {', '.join(archives)}: {len(index)} bouquets, missing {missing}\n")
+        return archives, missing
+    finally:
+        _refresh_lock.release()
+
+def load_cache_stamp(max_age=WARM_CACHE_MAX_AGE):
+    try:
+        with open(os.path.join(TMP_DOWNLOAD, CACHE_STAMP), 'r', encoding='utf-8') as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - stamp.get("time", 0) > max_age:
+        return None
+    if stamp.get("source") != config.plugins.CiefpChannelManager.source.value or stamp.get("packages") != get_package_names():
+        return None
+    return stamp
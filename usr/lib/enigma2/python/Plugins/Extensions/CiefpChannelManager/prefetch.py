@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from enigma import eDVBDB, eTimer
+from Components.config import config
+from .bouquetdiff import record_upstream_bases
+from .delta import apply_update, open_settings_zip, plan_package_update
+from .packages import package_archive_path, refresh_settings_cache
+from .snapshots import take_snapshot
+
+PREFETCH_POLL_INTERVAL = 1000
+PREFETCH_RETRY_DELAY = 600
+
+_scheduler = None
+
+def is_recording():
+    try:
+        import NavigationInstance
+        return bool(NavigationInstance.instance.getRecordings())
+    except Exception:
+        return False
+
+def notify_skipped(names):
+    try:
+        from Screens.MessageBox import MessageBox
+        from Tools import Notifications
+        shown = ", ".join(names[:5]) + (", ..." if len(names) > 5 else "")
+        Notifications.AddNotification(
+            MessageBox,
+            f"Automatic update skipped {len(names)} locally modified files ({shown}). Use 'Update installed bouquets' to merge them.",
+            MessageBox.TYPE_INFO,
+            timeout=15
+        )
+    except Exception as e:
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Prefetch notification failed: {str(e)}\n")
+
+class PrefetchScheduler:
+    def __init__(self, session):
+        self.session = session
+        self.thread = None
+        self.applied = 0
+        self.skipped = []
+        self.untracked = []
+        self.boot_done = False
+        self.timer = eTimer()
+        self.timer.callback.append(self.run)
+        self.poll_timer = eTimer()
+        self.poll_timer.callback.append(self.poll)
+
+    def schedule(self):
+        self.timer.stop()
+        cfg = config.plugins.CiefpChannelManager
+        if cfg.prefetch.value == "boot":
+            if self.boot_done:
+                return
+            delay = cfg.prefetch_delay.value * 60
+        elif cfg.prefetch.value == "nightly":
+            now = time.localtime()
+            target = time.mktime((now.tm_year, now.tm_mon, now.tm_mday, cfg.prefetch_hour.value, 0, 0, 0, 0, -1))
+            if target <= time.time():
+                target += 24 * 3600
+            delay = target - time.time()
+        else:
+            return
+        self.timer.startLongTimer(int(delay))
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Prefetch ({cfg.prefetch.value}) scheduled in {int(delay)} seconds\n")
+
+    def run(self):
+        if (self.thread and self.thread.is_alive()) or is_recording():
+            self.timer.startLongTimer(PREFETCH_RETRY_DELAY)
+            return
+        self.boot_done = True
+        self.applied = 0
+        self.skipped = []
+        self.untracked = []
+        self.thread = threading.Thread(target=self.prefetch)
+        self.thread.daemon = True
+        self.thread.start()
+        self.poll_timer.start(PREFETCH_POLL_INTERVAL, False)
+
+    def prefetch(self):
+        try:
+            archives, missing = refresh_settings_cache()
+            if config.plugins.CiefpChannelManager.prefetch_apply.value:
+                plan = plan_package_update([open_settings_zip(package_archive_path(package)) for package in archives])
+                changes = plan.changed
+                self.skipped = sorted(os.path.basename(target) for archive, member, target in plan.modified)
+                self.untracked = sorted(os.path.basename(target) for archive, member, target in plan.untracked)
+                if changes:
+                    take_snapshot("Automatic update")
+                    apply_update(changes)
+                    record_upstream_bases(target for archive, member, target in changes)
+                    self.applied = len(changes)
+            with open("/tmp/channel_editor_debug.log", 'a') as df:
+                df.write(f"Prefetch finished: {len(archives)} packages, {self.applied} installed files updated, "
+                         f"skipped locally modified {self.skipped}, skipped untracked {self.untracked}\n")
+        except Exception as e:
+            with open("/tmp/channel_editor_debug.log", 'a') as df:
+                df.write(f"Prefetch failed: {str(e)}\n")
+
+    def poll(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.poll_timer.stop()
+        if self.applied:
+            try:
+                eDVBDB.getInstance().reloadServicelist()
+                eDVBDB.getInstance().reloadBouquets()
+            except Exception as e:
+                with open("/tmp/channel_editor_debug.log", 'a') as df:
+                    df.write(f"Reload after prefetch failed: {str(e)}\n")
+        if self.skipped:
+            notify_skipped(self.skipped)
+        self.schedule()
+
+def update_prefetch(session):
+    global _scheduler
+    if _scheduler is None:
+        if config.plugins.CiefpChannelManager.prefetch.value == "off":
+            return
+        _scheduler = PrefetchScheduler(session)
+    _scheduler.schedule()
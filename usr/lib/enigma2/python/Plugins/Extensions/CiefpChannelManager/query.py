@@ -0,0 +1,253 @@
+import hashlib
+import re
+from .bouquets import collation_key
+from .lamedb import ORBPOS_CABLE, ORBPOS_TERRESTRIAL, format_orbital_position, parse_transponder_orbpos
+from .watcher import file_version
+
+ENIGMA2_LAMEDB = "/etc/enigma2/lamedb"
+SERVICE_CATEGORIES = {
+    0x02: "radio", 0x0a: "radio",
+    0x11: "hd", 0x19: "hd", 0x1b: "hd",
+    0x1f: "uhd", 0x20: "uhd",
+}
+QUERY_FIELDS = ("name", "provider", "type", "caid", "fta", "sat")
+FIELD_ALIASES = {"orbpos": "sat", "satellite": "sat", "position": "sat", "caids": "caid"}
+CONDITION = re.compile(r'\s*(\w+)\s*(?:(!=|=|~|\bin\b)\s*("[^"]*"|[^\s"]+))?\s*(?:\band\b|$)', re.IGNORECASE)
+TRUE_VALUES = ("1", "yes", "true", "on")
+FALSE_VALUES = ("0", "no", "false", "off")
+
+_table_cache = {}
+
+class QueryError(Exception):
+    pass
+
+class ServiceTable:
+    def __init__(self):
+        self.sids = []
+        self.namespaces = []
+        self.tsids = []
+        self.onids = []
+        self.types = []
+        self.names = []
+        self.providers = []
+        self.caids = []
+        self.fta = []
+        self.orbpos = []
+        self.categories = []
+        self.name_keys = []
+        self.provider_keys = []
+
+    def __len__(self):
+        return len(self.sids)
+
+    def service_ref(self, row):
+        return (f"1:0:{self.types[row]:X}:{self.sids[row]:X}:{self.tsids[row]:X}:"
+                f"{self.onids[row]:X}:{self.namespaces[row]:X}:0:0:0:")
+
+    def column(self, field):
+        if field == "name":
+            return self.name_keys
+        if field == "provider":
+            return self.provider_keys
+        if field == "type":
+            return self.categories
+        if field == "caid":
+            return self.caids
+        if field == "fta":
+            return self.fta
+        return self.orbpos
+
+def parse_orbital_position(text):
+    text = text.strip().upper()
+    if text in ("DVB-T", "T"):
+        return ORBPOS_TERRESTRIAL
+    if text in ("DVB-C", "C"):
+        return ORBPOS_CABLE
+    try:
+        if text.endswith("W"):
+            return 3600 - int(round(float(text[:-1]) * 10))
+        return int(round(float(text.rstrip("E")) * 10))
+    except ValueError:
+        raise QueryError(f"Invalid orbital position: {text}")
+
+def parse_provider_line(line):
+    provider = ""
+    caids = []
+    for index, part in enumerate(line[2:].split(",")):
+        if index == 0:
+            provider = part.strip()
+        elif part.startswith("C:"):
+            try:
+                caid = int(part[2:], 16)
+            except ValueError:
+                continue
+            if caid:
+                caids.append(caid)
+    return provider, tuple(caids)
+
+def load_service_table(lamedb_path=ENIGMA2_LAMEDB):
+    stamp = file_version(lamedb_path)
+    if stamp is None:
+        return ServiceTable()
+    cached = _table_cache.get(lamedb_path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    table = ServiceTable()
+    transponders = {}
+    with open(lamedb_path, 'r', encoding='utf-8', errors='ignore') as f:
+        section = None
+        transponder_key = None
+        block = []
+        for line in f:
+            line = line.strip()
+            if section is None:
+                if line in ("transponders", "services"):
+                    section = line
+                continue
+            if line == "end":
+                section = None
+                continue
+            if section == "transponders":
+                if line == "/":
+                    transponder_key = None
+                elif transponder_key is None:
+                    transponder_key = line.lower()
+                else:
+                    orbpos = parse_transponder_orbpos(line)
+                    if orbpos is not None:
+                        transponders[transponder_key] = orbpos
+                continue
+            block.append(line)
+            if len(block) < 3:
+                continue
+            key_line, name, provider_line = block
+            block = []
+            parts = key_line.split(":")
+            try:
+                sid, namespace, tsid, onid, service_type = (int(parts[0], 16), int(parts[1], 16),
+                                                            int(parts[2], 16), int(parts[3], 16), int(parts[4]))
+            except (IndexError, ValueError):
+                continue
+            provider, caids = parse_provider_line(provider_line) if provider_line.startswith("p:") else ("", ())
+            orbpos = transponders.get(f"{parts[1]}:{parts[2]}:{parts[3]}".lower())
+            if orbpos is None:
+                orbpos = namespace >> 16
+            table.sids.append(sid)
+            table.namespaces.append(namespace)
+            table.tsids.append(tsid)
+            table.onids.append(onid)
+            table.types.append(service_type)
+            table.names.append(name)
+            table.providers.append(provider)
+            table.caids.append(caids)
+            table.fta.append(not caids)
+            table.orbpos.append(orbpos)
+            table.categories.append(SERVICE_CATEGORIES.get(service_type, "tv"))
+            table.name_keys.append(collation_key(name))
+            table.provider_keys.append(collation_key(provider))
+    _table_cache[lamedb_path] = (stamp, table)
+    return table
+
+def parse_value(field, value):
+    if field in ("name", "provider"):
+        return collation_key(value)
+    if field == "type":
+        value = value.lower()
+        if value not in ("tv", "radio", "hd", "uhd"):
+            raise QueryError(f"Unknown service type: {value} (use tv, radio, hd or uhd)")
+        return value
+    if field == "caid":
+        try:
+            return int(value, 16)
+        except ValueError:
+            raise QueryError(f"Invalid CAID: {value}")
+    if field == "fta":
+        if value.lower() in TRUE_VALUES:
+            return True
+        if value.lower() in FALSE_VALUES:
+            return False
+        raise QueryError(f"Invalid value for fta: {value}")
+    return parse_orbital_position(value)
+
+def parse_query(text):
+    conditions = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = CONDITION.match(text, position)
+        if not match or match.end() == position:
+            raise QueryError(f"Cannot parse query near: {text[position:]}")
+        field, operator, value = match.groups()
+        field = FIELD_ALIASES.get(field.lower(), field.lower())
+        if field not in QUERY_FIELDS:
+            raise QueryError(f"Unknown field: {field} (use {', '.join(QUERY_FIELDS)})")
+        if operator is None:
+            if field != "fta":
+                raise QueryError(f"Missing condition for {field}")
+            operator, value = "=", "yes"
+        operator = operator.lower()
+        value = value[1:-1] if value.startswith('"') else value
+        if operator == "~" and field not in ("name", "provider"):
+            raise QueryError("~ only works on name and provider")
+        if operator == "in":
+            values = set(parse_value(field, item) for item in value.split(",") if item.strip())
+        else:
+            values = {parse_value(field, value)}
+        conditions.append((field, operator, values))
+        position = match.end()
+    if not conditions:
+        raise QueryError("Empty query")
+    return conditions
+
+def run_query(table, conditions):
+    rows = range(len(table))
+    for field, operator, values in conditions:
+        column = table.column(field)
+        if field == "caid":
+            if operator == "!=":
+                rows = [i for i in rows if values.isdisjoint(column[i])]
+            else:
+                rows = [i for i in rows if not values.isdisjoint(column[i])]
+        elif operator == "~":
+            needle = next(iter(values))
+            rows = [i for i in rows if needle in column[i]]
+        elif operator == "!=":
+            rows = [i for i in rows if column[i] not in values]
+        elif len(values) == 1:
+            value = next(iter(values))
+            rows = [i for i in rows if column[i] == value]
+        else:
+            rows = [i for i in rows if column[i] in values]
+    return list(rows)
+
+def query_bouquet_lines(table, rows, bouquet_name, group_by_provider=False):
+    lines = [f"#NAME {bouquet_name}\n"]
+    if group_by_provider:
+        groups = {}
+        for row in rows:
+            groups.setdefault(table.providers[row] or "Unknown", []).append(row)
+        ordered = sorted(groups.items(), key=lambda item: collation_key(item[0]))
+    else:
+        ordered = [(None, rows)]
+    for marker, (provider, group) in enumerate(ordered, 1):
+        if provider is not None:
+            lines.append(f"#SERVICE 1:64:{marker}:0:0:0:0:0:0:0::{provider}\n")
+            lines.append(f"#DESCRIPTION {provider}\n")
+        for row in sorted(group, key=lambda row: table.name_keys[row]):
+            lines.append(f"#SERVICE {table.service_ref(row)}\n")
+    return lines
+
+def query_bouquet_file(bouquet_name):
+    slug = re.sub(r"[^a-z0-9]+", "_", collation_key(bouquet_name)).strip("_") or "query"
+    digest = hashlib.sha1(bouquet_name.strip().encode("utf-8")).hexdigest()[:6]
+    return f"userbouquet.ciefp_query_{slug}_{digest}.tv"
+
+def describe_query(conditions):
+    parts = []
+    for field, operator, values in conditions:
+        if field == "sat":
+            values = [format_orbital_position(value) for value in values]
+        elif field == "caid":
+            values = [f"{value:04X}" for value in values]
+        parts.append(f"{field} {operator} {','.join(str(value) for value in sorted(values, key=str))}")
+    return " and ".join(parts)
@@ -0,0 +1,87 @@
+from .lamedb import load_lamedb, service_key_from_ref
+
+ENIGMA2_LAMEDB = "/etc/enigma2/lamedb"
+
+_name_resolver = None
+
+def clean_service_name(name):
+    return name.replace("\xc2\x86", "").replace("\xc2\x87", "").replace("\x86", "").replace("\x87", "").strip()
+
+class LamedbFileResolver:
+    def __init__(self, lamedb_path=ENIGMA2_LAMEDB):
+        self.lamedb_path = lamedb_path
+
+    def resolve(self, refs, bouquet_file=None):
+        names = load_lamedb(self.lamedb_path).names
+        resolved = {}
+        for ref in refs:
+            key = service_key_from_ref(ref)
+            if key in names:
+                resolved[key] = names[key]
+        return resolved
+
+class ServiceCenterResolver:
+    def __init__(self, service_center=None):
+        self.service_center = service_center
+
+    def get_service_center(self):
+        if self.service_center is None:
+            from enigma import eServiceCenter
+            self.service_center = eServiceCenter.getInstance()
+        return self.service_center
+
+    def resolve(self, refs, bouquet_file=None):
+        from enigma import eServiceReference
+        service_center = self.get_service_center()
+        if service_center is None:
+            return {}
+        wanted = {}
+        for ref in refs:
+            key = service_key_from_ref(ref)
+            if key:
+                wanted[key] = ref.replace("#SERVICE", "", 1).strip()
+        resolved = {}
+        if bouquet_file:
+            services = service_center.list(eServiceReference(f'1:7:1:0:0:0:0:0:0:0:FROM BOUQUET "{bouquet_file}" ORDER BY bouquet'))
+            content = services.getContent("SN", True) if services else None
+            for ref, name in content or ():
+                key = service_key_from_ref(ref)
+                if key in wanted and name:
+                    resolved[key] = clean_service_name(name)
+        for key, ref in wanted.items():
+            if key in resolved:
+                continue
+            service = eServiceReference(ref)
+            info = service_center.info(service)
+            name = info.getName(service) if info else None
+            if name:
+                resolved[key] = clean_service_name(name)
+        return resolved
+
+class ChainResolver:
+    def __init__(self, *resolvers):
+        self.resolvers = resolvers
+
+    def resolve(self, refs, bouquet_file=None):
+        resolved = {}
+        pending = list(refs)
+        for resolver in self.resolvers:
+            try:
+                resolved.update(resolver.resolve(pending, bouquet_file))
+            except Exception as e:
+                with open("/tmp/channel_editor_debug.log", 'a') as df:
+                    df.write(f"{resolver.__class__.__name__} failed: {str(e)}\n")
+                continue
+            pending = [ref for ref in pending if service_key_from_ref(ref) not in resolved]
+            if not pending:
+                break
+        return resolved
+
+def get_name_resolver():
+    if _name_resolver is None:
+        return ChainResolver(ServiceCenterResolver(), LamedbFileResolver())
+    return _name_resolver
+
+def set_name_resolver(resolver):
+    global _name_resolver
+    _name_resolver = resolver
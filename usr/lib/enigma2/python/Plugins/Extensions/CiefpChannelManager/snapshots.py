@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+from .watcher import ENIGMA2_DIR, is_watched_name
+
+HASH_CHUNK_SIZE = 65536
+
+def hash_file(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def write_json_atomic(path, data):
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+class SnapshotStore:
+    def __init__(self, store_dir, source_dir=ENIGMA2_DIR):
+        self.store_dir = store_dir
+        self.source_dir = source_dir
+        self.objects_dir = os.path.join(store_dir, "objects")
+        self.manifests_dir = os.path.join(store_dir, "manifests")
+        self.stat_cache_path = os.path.join(store_dir, "statcache.json")
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def load_stat_cache(self):
+        try:
+            with open(self.stat_cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def store_object(self, path, digest):
+        object_path = self.object_path(digest)
+        if os.path.exists(object_path):
+            return 0
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        with open(path, 'rb') as src, gzip.open(object_path + ".tmp", 'wb') as dst:
+            shutil.copyfileobj(src, dst, HASH_CHUNK_SIZE)
+        os.replace(object_path + ".tmp", object_path)
+        return 1
+
+    def snapshot(self, reason):
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        stat_cache = self.load_stat_cache()
+        new_stat_cache = {}
+        files = {}
+        stored = 0
+        for entry in os.scandir(self.source_dir):
+            if not entry.is_file() or not is_watched_name(entry.name):
+                continue
+            st = entry.stat()
+            stamp = [st.st_mtime_ns, st.st_size]
+            cached = stat_cache.get(entry.name)
+            if cached and cached[:2] == stamp and os.path.exists(self.object_path(cached[2])):
+                digest = cached[2]
+            else:
+                digest = hash_file(entry.path)
+                stored += self.store_object(entry.path, digest)
+            files[entry.name] = digest
+            new_stat_cache[entry.name] = stamp + [digest]
+        write_json_atomic(self.stat_cache_path, new_stat_cache)
+        latest = self.list_snapshots()[:1]
+        if latest and latest[0]["files"] == files:
+            return latest[0]["id"], 0
+        snapshot_id = time.strftime("%Y%m%d-%H%M%S")
+        suffix = 1
+        while os.path.exists(os.path.join(self.manifests_dir, snapshot_id + ".json")):
+            snapshot_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+            suffix += 1
+        write_json_atomic(os.path.join(self.manifests_dir, snapshot_id + ".json"), {
+            "id": snapshot_id,
+            "created": time.time(),
+            "reason": reason,
+            "files": files,
+        })
+        return snapshot_id, stored
+
+    def list_snapshots(self):
+        snapshots = []
+        if not os.path.isdir(self.manifests_dir):
+            return snapshots
+        for name in os.listdir(self.manifests_dir):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.manifests_dir, name), 'r', encoding='utf-8') as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        snapshots.sort(key=lambda manifest: manifest["created"], reverse=True)
+        return snapshots
+
+    def read_manifest(self, snapshot_id):
+        with open(os.path.join(self.manifests_dir, snapshot_id + ".json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def restore(self, snapshot_id, manifest=None):
+        files = (manifest or self.read_manifest(snapshot_id))["files"]
+        staged = []
+        try:
+            for name, digest in files.items():
+                target = os.path.join(self.source_dir, name)
+                with gzip.open(self.object_path(digest), 'rb') as src, open(target + ".tmp", 'wb') as dst:
+                    shutil.copyfileobj(src, dst, HASH_CHUNK_SIZE)
+                staged.append(target)
+        except Exception:
+            for target in staged:
+                if os.path.exists(target + ".tmp"):
+                    os.remove(target + ".tmp")
+            raise
+        for target in staged:
+            os.replace(target + ".tmp", target)
+        for entry in os.scandir(self.source_dir):
+            if entry.is_file() and is_watched_name(entry.name) and entry.name not in files:
+                os.remove(entry.path)
+        return len(staged)
+
+    def prune(self, keep, protect=()):
+        snapshots = self.list_snapshots()
+        kept = snapshots[:keep] + [manifest for manifest in snapshots[keep:] if manifest["id"] in protect]
+        for manifest in snapshots[keep:]:
+            if manifest["id"] not in protect:
+                os.remove(os.path.join(self.manifests_dir, manifest["id"] + ".json"))
+        referenced = set()
+        for manifest in kept:
+            referenced.update(manifest["files"].values())
+        removed = 0
+        if os.path.isdir(self.objects_dir):
+            for prefix in os.listdir(self.objects_dir):
+                prefix_dir = os.path.join(self.objects_dir, prefix)
+                for digest in os.listdir(prefix_dir):
+                    if digest not in referenced:
+                        os.remove(os.path.join(prefix_dir, digest))
+                        removed += 1
+        return removed
+
+def get_snapshot_store():
+    from Components.config import config
+    return SnapshotStore(config.plugins.CiefpChannelManager.snapshot_dir.value)
+
+def take_snapshot(reason, protect=()):
+    from Components.config import config
+    cfg = config.plugins.CiefpChannelManager
+    if not cfg.snapshots.value:
+        return None
+    try:
+        store = get_snapshot_store()
+        snapshot_id, stored = store.snapshot(reason)
+        store.prune(cfg.snapshot_keep.value, protect)
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Snapshot {snapshot_id} ({reason}): {stored} new objects\n")
+        return snapshot_id
+    except Exception as e:
+        with open("/tmp/channel_editor_debug.log", 'a') as df:
+            df.write(f"Snapshot failed ({reason}): {str(e)}\n")
+        return None
@@ -0,0 +1,130 @@
+import ctypes
+import os
+import struct
+import time
+
+ENIGMA2_DIR = "/etc/enigma2"
+WATCHED_PREFIXES = ("lamedb", "bouquets.", "userbouquet.", "subbouquet.")
+STAT_POLL_INTERVAL = 2
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+_watchers = {}
+
+def is_watched_name(name):
+    return name.startswith(WATCHED_PREFIXES) and not name.endswith(".tmp")
+
+class DirectoryWatcher:
+    def __init__(self, path):
+        self.path = path
+        self.generations = {}
+        self.resets = 0
+        self.fd = None
+        self.snapshot = None
+        self.last_scan = 0
+        self.start_inotify()
+        if self.fd is None:
+            self.snapshot = self.scan()
+            self.last_scan = time.time()
+
+    def start_inotify(self):
+        try:
+            libc = ctypes.CDLL("libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                return
+            if libc.inotify_add_watch(fd, self.path.encode("utf-8"), WATCH_MASK) < 0:
+                os.close(fd)
+                return
+            self.fd = fd
+        except (OSError, AttributeError):
+            self.fd = None
+
+    def scan(self):
+        snapshot = {}
+        try:
+            for entry in os.scandir(self.path):
+                if is_watched_name(entry.name):
+                    st = entry.stat()
+                    snapshot[entry.name] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass
+        return snapshot
+
+    def bump(self, name):
+        self.generations[name] = self.generations.get(name, 0) + 1
+
+    def poll(self):
+        if self.fd is not None:
+            self.read_events()
+        elif time.time() - self.last_scan >= STAT_POLL_INTERVAL:
+            snapshot = self.scan()
+            for name in set(snapshot) | set(self.snapshot):
+                if snapshot.get(name) != self.snapshot.get(name):
+                    self.bump(name)
+            self.snapshot = snapshot
+            self.last_scan = time.time()
+
+    def read_events(self):
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return
+            except OSError:
+                self.fall_back_to_stat()
+                return
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "ignore")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    self.resets += 1
+                elif mask & IN_IGNORED:
+                    self.fall_back_to_stat()
+                    return
+                elif is_watched_name(name):
+                    self.bump(name)
+
+    def fall_back_to_stat(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        self.resets += 1
+        self.snapshot = self.scan()
+        self.last_scan = time.time()
+
+    def version(self, name):
+        self.poll()
+        return (self.resets, self.generations.get(name, 0))
+
+def get_watcher(path=ENIGMA2_DIR):
+    watcher = _watchers.get(path)
+    if watcher is None:
+        watcher = DirectoryWatcher(path)
+        _watchers[path] = watcher
+    return watcher
+
+def file_version(path):
+    directory, name = os.path.split(path)
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime, st.st_size)
+    except OSError:
+        stamp = None
+    if directory == ENIGMA2_DIR and is_watched_name(name):
+        return get_watcher(directory).version(name) + (stamp,)
+    return stamp